@@ -7,9 +7,10 @@ visualizing energy spectra, and analyzing gate performance metrics.
 
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 import sys
 import os
+from dataclasses import dataclass, replace
+from typing import Optional
 
 # Add src directory to path
 base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -53,6 +54,215 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@dataclass(frozen=True)
+class GateParams:
+    """
+    Sidebar parameters of one simulation.
+
+    Frozen so that instances are hashable and can be passed whole to the
+    cached functions below: equal parameters always give the same cache key,
+    however they were collected.
+    """
+    gate_type: str
+    Ej: float
+    Ec: float
+    flux: float
+    Ej2: Optional[float] = None
+    J: Optional[float] = None
+    flux2: Optional[float] = None
+    n_levels: int = 10
+    trunc: int = 20
+
+
+# Cached circuit builders.
+#
+# Streamlit reruns the whole script on every widget interaction, so building
+# the SQcircuit objects directly would redo the element construction and the
+# truncated-basis setup each time. The instances returned below are shared
+# across reruns and sessions: every mutation (truncation, charge offset) is
+# done inside the builder itself, and callers must not mutate the returned
+# circuit in-place.
+
+@st.cache_resource(max_entries=32)
+def _cached_inverter(Ej, Ec, flux, ng=0.0, trunc=20):
+    """Build (or reuse) an RQL inverter circuit for the given parameters."""
+    return circuit_builder.build_rql_inverter(
+        Ej=Ej, Ec=Ec, flux=flux, ng=ng, trunc=trunc
+    )
+
+
+@st.cache_resource(max_entries=32)
+def _cached_anb_gate(Ej1, Ej2, Ec, J, flux1, flux2, trunc=20):
+    """Build (or reuse) an ANB gate circuit for the given parameters."""
+    return circuit_builder.build_anb_gate(
+        Ej1=Ej1, Ej2=Ej2, Ec=Ec, J=J, flux1=flux1, flux2=flux2, trunc=trunc
+    )
+
+
+@st.cache_resource(max_entries=32)
+def _cached_rql_loop(Ej, Ec, flux, trunc=20):
+    """Build (or reuse) an RQL loop circuit for the given parameters."""
+    return circuit_builder.build_rql_loop(Ej=Ej, Ec=Ec, flux=flux, trunc=trunc)
+
+
+def _build_circuit(params, shared=True):
+    """
+    Return the circuit described by ``params``.
+
+    Args:
+        params (GateParams): Gate type and physical parameters.
+        shared (bool): Return the cached instance shared across reruns and
+            sessions, which must not be mutated in-place. If False, build a
+            private circuit the caller may mutate. Default is True.
+
+    Returns:
+        SQcircuit.Circuit: Circuit instance.
+    """
+    if params.gate_type == "Inverter":
+        cached, build = _cached_inverter, circuit_builder.build_rql_inverter
+        kwargs = dict(Ej=params.Ej, Ec=params.Ec, flux=params.flux)
+    elif params.gate_type == "A-NOT-B (ANB)":
+        cached, build = _cached_anb_gate, circuit_builder.build_anb_gate
+        kwargs = dict(Ej1=params.Ej, Ej2=params.Ej2, Ec=params.Ec, J=params.J,
+                      flux1=params.flux, flux2=params.flux2)
+    elif params.gate_type == "RQL Loop":
+        cached, build = _cached_rql_loop, circuit_builder.build_rql_loop
+        kwargs = dict(Ej=params.Ej, Ec=params.Ec, flux=params.flux)
+    else:
+        raise ValueError(f"Unknown gate type: {params.gate_type}")
+    return (cached if shared else build)(trunc=params.trunc, **kwargs)
+
+
+# Cached simulation results.
+#
+# Keyed by the GateParams rather than by the circuit object, so a rerun that
+# only touches plot widgets skips the Hamiltonian construction and
+# eigensolve entirely.
+
+@st.cache_data(max_entries=64)
+def run_diag(params):
+    """
+    Diagonalize the circuit described by ``params``.
+
+    Only the energies are displayed, so eigenvectors are neither computed
+    nor stored in the cache.
+    """
+    circuit = _build_circuit(params)
+    return simulator.diagonalize_hamiltonian(
+        circuit, n_levels=params.n_levels, return_eigvecs=False
+    )
+
+
+@st.cache_data(max_entries=64)
+def run_flux_sweep(params, n_points, _n_jobs=1):
+    """
+    Sweep the flux of the circuit described by ``params``.
+
+    ``_n_jobs`` does not change the result, so the leading underscore keeps
+    it out of the cache key. The sweep changes the loop flux in place, so it
+    runs on a private circuit: another session diagonalizing the shared one
+    meanwhile would otherwise see the swept flux.
+    """
+    circuit = _build_circuit(params, shared=False)
+    return simulator.flux_sweep(
+        circuit,
+        flux_range=(0.0, 1.0),
+        n_points=n_points,
+        n_levels=params.n_levels,
+        n_jobs=_n_jobs
+    )
+
+
+# Session figures.
+#
+# Allocating a matplotlib Figure/Axes (backend setup, transform trees)
+# dominates the cost of these small plots, so each session keeps one
+# figure per plot in st.session_state and only clears and redraws the axes
+# when the plotted data changes. Figures are created from
+# matplotlib.figure.Figure directly so they stay out of pyplot's global
+# figure registry.
+
+def _session_plot(name, figsize, data_key, draw):
+    """
+    Return the session figure for ``name``, redrawn only if the data changed.
+
+    Args:
+        name (str): Plot slot name in st.session_state.
+        figsize (tuple): Figure size used when the figure is first created.
+        data_key (tuple): Hashable description of the plotted data.
+        draw (callable): Called with the cleared axes to redraw the plot.
+
+    Returns:
+        matplotlib.figure.Figure: The session's figure for this plot.
+    """
+    fig_key, ax_key = f'_fig_{name}', f'_ax_{name}'
+    data_state_key = f'_data_{name}'
+    if fig_key not in st.session_state:
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=figsize)
+        st.session_state[fig_key] = fig
+        st.session_state[ax_key] = fig.subplots()
+        st.session_state[data_state_key] = None
+    
+    if st.session_state[data_state_key] != data_key:
+        ax = st.session_state[ax_key]
+        ax.clear()
+        draw(ax)
+        st.session_state[data_state_key] = data_key
+    
+    return st.session_state[fig_key]
+
+
+@st.cache_data(max_entries=64)
+def _sweep_stats(flux_values, energy_levels):
+    """
+    Compute per-level statistics of a flux sweep in one NumPy pass.
+
+    Args:
+        flux_values (np.ndarray): Swept flux values.
+        energy_levels (np.ndarray): 2D array (n_points, n_levels) of energies.
+
+    Returns:
+        tuple: (min, max, max |dE/dΦ|) arrays, one entry per level; NaN
+            rows from failed sweep points are ignored.
+    """
+    slopes = np.abs(np.gradient(energy_levels, flux_values, axis=0))
+    return (np.nanmin(energy_levels, axis=0), np.nanmax(energy_levels, axis=0),
+            np.nanmax(slopes, axis=0))
+
+
+@st.fragment
+def _anti_crossing_section(flux_sweep_data, n_levels, gate_type):
+    """
+    Render the anti-crossing controls and plot.
+
+    Runs as a fragment so dragging the level sliders only reruns this
+    section instead of the whole page.
+
+    Args:
+        flux_sweep_data (tuple): (flux_values, energy_levels) of the sweep.
+        n_levels (int): Number of computed energy levels.
+        gate_type (str): Gate type, used in the plot title.
+    """
+    st.subheader("🔀 Anti-Crossing Analysis")
+    level1 = st.slider("First Level", 0, min(4, n_levels-1), 0)
+    level2 = st.slider("Second Level", 1, min(5, n_levels-1), 1)
+    
+    if st.button("Plot Anti-Crossing"):
+        try:
+            flux_values, energy_levels = flux_sweep_data
+            fig = utils.plot_anti_crossing(
+                flux_values,
+                energy_levels,
+                level1=level1,
+                level2=level2,
+                title=f"{gate_type} - Anti-Crossing: Levels {level1} and {level2}"
+            )
+            st.pyplot(fig)
+        except Exception as e:
+            st.error(f"Error plotting anti-crossing: {e}")
+
+
 def main():
     """Main Streamlit application."""
     
@@ -72,87 +282,133 @@ def main():
             index=0
         )
         
-        st.subheader("Physical Parameters")
-        
-        # Josephson energy
-        Ej = st.slider(
-            "Josephson Energy (Ej) [GHz]",
-            min_value=1.0,
-            max_value=100.0,
-            value=10.0,
-            step=0.1,
-            help="Josephson junction energy in GHz"
-        )
-        
-        # Charging energy
-        Ec = st.slider(
-            "Charging Energy (Ec) [GHz]",
-            min_value=0.01,
-            max_value=10.0,
-            value=0.2,
-            step=0.01,
-            help="Capacitive charging energy in GHz"
-        )
-        
-        # Flux bias
-        flux = st.slider(
-            "Flux Bias (Φ) [Φ₀]",
-            min_value=0.0,
-            max_value=1.0,
-            value=0.5,
-            step=0.01,
-            help="External flux bias in units of flux quantum"
-        )
-        
-        # Additional parameters for ANB gate
-        if gate_type == "A-NOT-B (ANB)":
-            Ej2 = st.slider(
-                "Josephson Energy 2 (Ej2) [GHz]",
+        # Batch parameter changes: widgets inside the form only trigger a
+        # rerun when "Apply" is pressed. The gate type stays outside so the
+        # gate-specific sliders appear as soon as it changes.
+        with st.form("params"):
+            st.subheader("Physical Parameters")
+            
+            # Josephson energy
+            Ej = st.slider(
+                "Josephson Energy (Ej) [GHz]",
                 min_value=1.0,
                 max_value=100.0,
                 value=10.0,
-                step=0.1
+                step=0.1,
+                help="Josephson junction energy in GHz"
             )
-            J = st.slider(
-                "Coupling Strength (J) [GHz]",
+            
+            # Charging energy
+            Ec = st.slider(
+                "Charging Energy (Ec) [GHz]",
                 min_value=0.01,
                 max_value=10.0,
-                value=0.5,
-                step=0.01
+                value=0.2,
+                step=0.01,
+                help="Capacitive charging energy in GHz"
             )
-            flux2 = st.slider(
-                "Flux Bias 2 (Φ2) [Φ₀]",
+            
+            # Flux bias
+            flux = st.slider(
+                "Flux Bias (Φ) [Φ₀]",
                 min_value=0.0,
                 max_value=1.0,
                 value=0.5,
-                step=0.01
+                step=0.01,
+                help="External flux bias in units of flux quantum"
             )
-        
-        # Simulation parameters
-        st.subheader("Simulation Parameters")
-        
-        n_levels = st.slider(
-            "Number of Energy Levels",
-            min_value=3,
-            max_value=50,
-            value=10,
-            step=1
-        )
-        
-        perform_flux_sweep = st.checkbox(
-            "Perform Flux Sweep",
-            value=False,
-            help="Sweep flux from 0 to 1 and compute energy levels"
-        )
-        
-        if perform_flux_sweep:
+            
+            # Additional parameters for ANB gate
+            if gate_type == "A-NOT-B (ANB)":
+                Ej2 = st.slider(
+                    "Josephson Energy 2 (Ej2) [GHz]",
+                    min_value=1.0,
+                    max_value=100.0,
+                    value=10.0,
+                    step=0.1
+                )
+                J = st.slider(
+                    "Coupling Strength (J) [GHz]",
+                    min_value=0.01,
+                    max_value=10.0,
+                    value=0.5,
+                    step=0.01
+                )
+                flux2 = st.slider(
+                    "Flux Bias 2 (Φ2) [Φ₀]",
+                    min_value=0.0,
+                    max_value=1.0,
+                    value=0.5,
+                    step=0.01
+                )
+            
+            # Simulation parameters
+            st.subheader("Simulation Parameters")
+            
+            n_levels = st.slider(
+                "Number of Energy Levels",
+                min_value=3,
+                max_value=50,
+                value=10,
+                step=1
+            )
+            
+            perform_flux_sweep = st.checkbox(
+                "Perform Flux Sweep",
+                value=False,
+                help="Sweep flux from 0 to 1 and compute energy levels"
+            )
+            
+            # Widget values inside a form only reach the script on submit, so
+            # the sweep settings are always rendered rather than only once
+            # the checkbox above has been applied
             n_points = st.slider(
                 "Flux Points",
                 min_value=10,
                 max_value=200,
                 value=100,
-                step=10
+                step=10,
+                help="Flux points of the sweep (used with Perform Flux Sweep)"
             )
+            n_jobs = st.number_input(
+                "Parallel Jobs",
+                min_value=1,
+                max_value=os.cpu_count() or 1,
+                value=1,
+                step=1,
+                help="Worker processes used for the flux sweep"
+            )
+            
+            with st.expander("Advanced"):
+                trunc = st.slider(
+                    "Truncation",
+                    min_value=8,
+                    max_value=60,
+                    value=20,
+                    step=1,
+                    help="Truncation number per circuit mode (Hilbert space size)"
+                )
+                check_convergence = st.checkbox(
+                    "Check truncation convergence",
+                    value=False,
+                    help="Also diagonalize at truncation + 4 and warn if the "
+                         "energies differ by more than the tolerance"
+                )
+                convergence_tol = st.number_input(
+                    "Convergence tolerance [GHz]",
+                    min_value=0.0,
+                    value=1e-3,
+                    format="%.1e"
+                )
+            
+            st.form_submit_button("Apply", use_container_width=True)
+        
+        if gate_type == "A-NOT-B (ANB)":
+            params = GateParams(gate_type, Ej, Ec, flux, Ej2=Ej2, J=J,
+                                flux2=flux2, n_levels=n_levels, trunc=trunc)
+        else:
+            params = GateParams(gate_type, Ej, Ec, flux,
+                                n_levels=n_levels, trunc=trunc)
     
     # Main content area
     col1, col2 = st.columns([2, 1])
@@ -169,128 +425,117 @@ def main():
         with col_btn2:
             simulate_button = st.button("⚡ Run Simulation", use_container_width=True)
         
-        # Initialize session state
-        if 'circuit' not in st.session_state:
-            st.session_state.circuit = None
-        if 'energies' not in st.session_state:
-            st.session_state.energies = None
-        if 'flux_sweep_data' not in st.session_state:
-            st.session_state.flux_sweep_data = None
+        # Initialize session state (UI state only; results live in the
+        # st.cache_data layer above)
+        if 'built_params' not in st.session_state:
+            st.session_state.built_params = None
+        if 'simulation' not in st.session_state:
+            st.session_state.simulation = None
+        
+        energies = None
+        flux_sweep_data = None
         
         # Build circuit
         if build_button:
             try:
                 with st.spinner("Building circuit..."):
-                    if gate_type == "Inverter":
-                        st.session_state.circuit = circuit_builder.build_rql_inverter(
-                            Ej=Ej, Ec=Ec, flux=flux
-                        )
-                    elif gate_type == "A-NOT-B (ANB)":
-                        st.session_state.circuit = circuit_builder.build_anb_gate(
-                            Ej1=Ej, Ej2=Ej2, Ec=Ec, J=J, flux1=flux, flux2=flux2
-                        )
-                    elif gate_type == "RQL Loop":
-                        st.session_state.circuit = circuit_builder.build_rql_loop(
-                            Ej=Ej, Ec=Ec, flux=flux
-                        )
+                    _build_circuit(params)
+                    st.session_state.built_params = params
+                    st.session_state.simulation = None
                     
                     st.success("✅ Circuit built successfully!")
-                    st.session_state.energies = None
-                    st.session_state.flux_sweep_data = None
                     
             except Exception as e:
                 st.error(f"❌ Error building circuit: {e}")
         
-        # Run simulation
-        if simulate_button or st.session_state.circuit is not None:
-            if st.session_state.circuit is None:
+        # Run simulation: only an explicit click starts one; later reruns
+        # redisplay the cached results of the last requested simulation
+        if simulate_button:
+            if st.session_state.built_params is None:
                 st.warning("⚠️ Please build circuit first!")
             else:
-                try:
-                    with st.spinner("Running simulation..."):
-                        if perform_flux_sweep:
-                            flux_values, energy_levels = simulator.flux_sweep(
-                                st.session_state.circuit,
-                                flux_range=(0.0, 1.0),
-                                n_points=n_points,
-                                n_levels=n_levels
-                            )
-                            st.session_state.flux_sweep_data = (flux_values, energy_levels)
-                            st.session_state.energies = None
-                            
-                            # Plot flux sweep
-                            fig = utils.plot_flux_sweep(
-                                flux_values,
-                                energy_levels,
-                                title=f"{gate_type} - Energy vs Flux"
-                            )
-                            st.pyplot(fig)
-                            
-                        else:
-                            energies, _ = simulator.diagonalize_hamiltonian(
-                                st.session_state.circuit,
-                                n_levels=n_levels
-                            )
-                            st.session_state.energies = energies
-                            st.session_state.flux_sweep_data = None
-                            
-                            # Plot energy spectrum
-                            fig = utils.plot_energy_spectrum(
-                                energies,
-                                title=f"{gate_type} - Energy Spectrum"
-                            )
-                            st.pyplot(fig)
+                st.session_state.simulation = {
+                    'params': replace(st.session_state.built_params,
+                                      n_levels=n_levels),
+                    'flux_sweep': perform_flux_sweep,
+                    'n_points': n_points if perform_flux_sweep else None,
+                    'n_jobs': n_jobs if perform_flux_sweep else 1,
+                    'check_convergence': check_convergence,
+                    'convergence_tol': convergence_tol,
+                }
+        
+        simulation = st.session_state.simulation
+        if simulation is not None:
+            sim_params = simulation['params']
+            built_gate_type = sim_params.gate_type
+            try:
+                with st.spinner("Running simulation..."):
+                    if simulation['flux_sweep']:
+                        flux_sweep_data = run_flux_sweep(
+                            sim_params,
+                            simulation['n_points'],
+                            _n_jobs=simulation['n_jobs']
+                        )
                         
-                        st.success("✅ Simulation completed successfully!")
+                    else:
+                        energies, _ = run_diag(sim_params)
                         
-                except Exception as e:
-                    st.error(f"❌ Error running simulation: {e}")
-                    st.exception(e)
+                        if simulation['check_convergence']:
+                            finer = replace(sim_params,
+                                            trunc=sim_params.trunc + 4)
+                            energies_ref, _ = run_diag(finer)
+                            deviation = np.max(np.abs(energies_ref - energies))
+                            if deviation > simulation['convergence_tol']:
+                                st.warning(
+                                    f"⚠️ Energies not converged: changed by "
+                                    f"{deviation:.2e} GHz at truncation "
+                                    f"{finer.trunc}"
+                                )
+                    
+                    if simulate_button:
+                        st.success("✅ Simulation completed successfully!")
+                    
+            except Exception as e:
+                st.error(f"❌ Error running simulation: {e}")
+                st.exception(e)
         
-        # Display existing results if available
-        if st.session_state.flux_sweep_data is not None:
-            flux_values, energy_levels = st.session_state.flux_sweep_data
-            fig = utils.plot_flux_sweep(
-                flux_values,
-                energy_levels,
-                title=f"{gate_type} - Energy vs Flux"
+        # Render the current result exactly once
+        if flux_sweep_data is not None:
+            flux_values, energy_levels = flux_sweep_data
+            title = f"{built_gate_type} - Energy vs Flux"
+            fig = _session_plot(
+                'flux', (12, 8),
+                (title, flux_values.tobytes(), energy_levels.tobytes()),
+                lambda ax: utils.plot_flux_sweep(
+                    flux_values, energy_levels, title=title, ax=ax
+                )
             )
             st.pyplot(fig)
         
-        elif st.session_state.energies is not None:
-            fig = utils.plot_energy_spectrum(
-                st.session_state.energies,
-                title=f"{gate_type} - Energy Spectrum"
+        elif energies is not None:
+            title = f"{built_gate_type} - Energy Spectrum"
+            fig = _session_plot(
+                'spectrum', (10, 6),
+                (title, np.asarray(energies).tobytes()),
+                lambda ax: utils.plot_energy_spectrum(
+                    energies, title=title, ax=ax
+                )
             )
             st.pyplot(fig)
         
         # Anti-crossing plot option
-        if st.session_state.flux_sweep_data is not None:
-            st.subheader("🔀 Anti-Crossing Analysis")
-            level1 = st.slider("First Level", 0, min(4, n_levels-1), 0)
-            level2 = st.slider("Second Level", 1, min(5, n_levels-1), 1)
-            
-            if st.button("Plot Anti-Crossing"):
-                try:
-                    flux_values, energy_levels = st.session_state.flux_sweep_data
-                    fig = utils.plot_anti_crossing(
-                        flux_values,
-                        energy_levels,
-                        level1=level1,
-                        level2=level2,
-                        title=f"Anti-Crossing: Levels {level1} and {level2}"
-                    )
-                    st.pyplot(fig)
-                except Exception as e:
-                    st.error(f"Error plotting anti-crossing: {e}")
+        if flux_sweep_data is not None:
+            _anti_crossing_section(
+                flux_sweep_data, sim_params.n_levels, built_gate_type
+            )
     
     with col2:
         st.header("📈 Metrics")
         
         # Display metrics
-        if st.session_state.energies is not None:
+        if energies is not None:
             try:
-                metrics = utils.calculate_gate_metrics(st.session_state.energies)
+                metrics = utils.calculate_gate_metrics(energies)
                 
                 st.metric(
                     "Ground State Energy",
@@ -312,8 +557,8 @@ def main():
                 # Energy levels table
                 st.subheader("Energy Levels")
                 energy_data = {
-                    'Level': list(range(min(10, len(st.session_state.energies)))),
-                    'Energy (GHz)': [f"{E:.4f}" for E in st.session_state.energies[:10]]
+                    'Level': list(range(min(10, len(energies)))),
+                    'Energy (GHz)': [f"{E:.4f}" for E in energies[:10]]
                 }
                 import pandas as pd
                 df = pd.DataFrame(energy_data)
@@ -322,19 +567,21 @@ def main():
             except Exception as e:
                 st.error(f"Error calculating metrics: {e}")
         
-        elif st.session_state.flux_sweep_data is not None:
-            flux_values, energy_levels = st.session_state.flux_sweep_data
+        elif flux_sweep_data is not None:
+            flux_values, energy_levels = flux_sweep_data
             st.info("Flux sweep data available. Adjust parameters to see metrics.")
             
             # Show some statistics
             st.subheader("Statistics")
-            min_energies = np.min(energy_levels, axis=0)
-            max_energies = np.max(energy_levels, axis=0)
+            min_energies, max_energies, max_slopes = _sweep_stats(
+                flux_values, energy_levels
+            )
             
             for i in range(min(3, energy_levels.shape[1])):
                 st.metric(
                     f"Level {i} Range",
-                    f"{min_energies[i]:.4f} - {max_energies[i]:.4f} GHz"
+                    f"{min_energies[i]:.4f} - {max_energies[i]:.4f} GHz",
+                    help=f"Max |dE/dΦ|: {max_slopes[i]:.4f} GHz/Φ₀"
                 )
         
         else:
@@ -15,8 +15,6 @@ src_dir = os.path.join(base_dir, 'src')
 sys.path.insert(0, base_dir)
 sys.path.insert(0, src_dir)
 
-from src import circuit_builder
-from src import simulator
 from src import utils
 
 
@@ -58,6 +56,12 @@ def main():
         default=10,
         help='Number of energy levels to compute (default: 10)'
     )
+    parser.add_argument(
+        '--trunc', 
+        type=int, 
+        default=20,
+        help='Truncation number per circuit mode (default: 20)'
+    )
     parser.add_argument(
         '--flux-sweep', 
         action='store_true',
@@ -69,6 +73,29 @@ def main():
         default=100,
         help='Number of flux points for sweep (default: 100)'
     )
+    parser.add_argument(
+        '--n-jobs', 
+        type=int, 
+        default=1,
+        help='Worker processes for the flux sweep, -1 for all cores (default: 1)'
+    )
+    parser.add_argument(
+        '--no-cache', 
+        action='store_true',
+        help='Do not read or write the on-disk result cache (~/.cache/rql_sim)'
+    )
+    parser.add_argument(
+        '--dpi', 
+        type=int, 
+        default=100,
+        help='Resolution of saved plots; use 300 for print quality, 72 for '
+             'draft thumbnails (default: 100)'
+    )
+    parser.add_argument(
+        '--no-save', 
+        action='store_true',
+        help='Skip plotting and do not write any image files'
+    )
     parser.add_argument(
         '--output', 
         type=str, 
@@ -78,9 +105,17 @@ def main():
     
     args = parser.parse_args()
     
+    # Imported after argument parsing so that --help does not pay for
+    # SQcircuit/QuTiP start-up
+    from src import circuit_builder
+    from src import simulator
+    
     # Setup logging
     utils.setup_logging()
     
+    if not args.no_cache:
+        simulator.set_disk_cache()
+    
     print("=" * 60)
     print("RQL Logic Gate Simulator")
     print("=" * 60)
@@ -95,15 +130,16 @@ def main():
         print("\n[1/3] Building circuit...")
         if args.gate == 'inverter':
             circuit = circuit_builder.build_rql_inverter(
-                Ej=args.Ej, Ec=args.Ec, flux=args.flux
+                Ej=args.Ej, Ec=args.Ec, flux=args.flux, trunc=args.trunc
             )
         elif args.gate == 'anb':
             circuit = circuit_builder.build_anb_gate(
-                Ej1=args.Ej, Ej2=args.Ej, Ec=args.Ec, flux1=args.flux, flux2=args.flux
+                Ej1=args.Ej, Ej2=args.Ej, Ec=args.Ec, flux1=args.flux, flux2=args.flux,
+                trunc=args.trunc
             )
         elif args.gate == 'loop':
             circuit = circuit_builder.build_rql_loop(
-                Ej=args.Ej, Ec=args.Ec, flux=args.flux
+                Ej=args.Ej, Ec=args.Ec, flux=args.flux, trunc=args.trunc
             )
         
         print("Checkpoint: Circuit built successfully")
@@ -115,33 +151,36 @@ def main():
                 circuit, 
                 flux_range=(0.0, 1.0),
                 n_points=args.n_points,
-                n_levels=args.n_levels
+                n_levels=args.n_levels,
+                n_jobs=args.n_jobs
             )
             
             print("Checkpoint: Flux sweep completed successfully")
             
             # Plot results
-            print("\n[3/3] Plotting results...")
-            fig = utils.plot_flux_sweep(
-                flux_values, 
-                energy_levels,
-                title=f"{args.gate.upper()} Gate - Energy vs Flux"
-            )
-            
-            if args.output:
-                os.makedirs(args.output, exist_ok=True)
-                save_path = os.path.join(args.output, f"{args.gate}_flux_sweep.png")
-            else:
-                save_path = f"{args.gate}_flux_sweep.png"
-            
-            fig.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Checkpoint: Results saved to {save_path}")
+            if not args.no_save:
+                print("\n[3/3] Plotting results...")
+                fig = utils.plot_flux_sweep(
+                    flux_values, 
+                    energy_levels,
+                    title=f"{args.gate.upper()} Gate - Energy vs Flux"
+                )
+                
+                if args.output:
+                    os.makedirs(args.output, exist_ok=True)
+                    save_path = os.path.join(args.output, f"{args.gate}_flux_sweep.png")
+                else:
+                    save_path = f"{args.gate}_flux_sweep.png"
+                
+                fig.savefig(save_path, dpi=args.dpi)
+                print(f"Checkpoint: Results saved to {save_path}")
             
         else:
             print("\n[2/3] Diagonalizing Hamiltonian...")
             energies, _ = simulator.diagonalize_hamiltonian(
                 circuit, 
-                n_levels=args.n_levels
+                n_levels=args.n_levels,
+                return_eigvecs=False
             )
             
             print("Checkpoint: Hamiltonian diagonalized successfully")
@@ -161,19 +200,20 @@ def main():
                 print(f"  Anharmonicity: {metrics['anharmonicity']:.4f} GHz")
             
             # Plot spectrum
-            fig = utils.plot_energy_spectrum(
-                energies,
-                title=f"{args.gate.upper()} Gate - Energy Spectrum"
-            )
-            
-            if args.output:
-                os.makedirs(args.output, exist_ok=True)
-                save_path = os.path.join(args.output, f"{args.gate}_spectrum.png")
-            else:
-                save_path = f"{args.gate}_spectrum.png"
-            
-            fig.savefig(save_path, dpi=300, bbox_inches='tight')
-            print(f"Checkpoint: Results saved to {save_path}")
+            if not args.no_save:
+                fig = utils.plot_energy_spectrum(
+                    energies,
+                    title=f"{args.gate.upper()} Gate - Energy Spectrum"
+                )
+                
+                if args.output:
+                    os.makedirs(args.output, exist_ok=True)
+                    save_path = os.path.join(args.output, f"{args.gate}_spectrum.png")
+                else:
+                    save_path = f"{args.gate}_spectrum.png"
+                
+                fig.savefig(save_path, dpi=args.dpi)
+                print(f"Checkpoint: Results saved to {save_path}")
         
         print("\n" + "=" * 60)
         print("Simulation completed successfully!")
@@ -6,23 +6,97 @@ using SQcircuit's API. It includes functionality to build superconducting
 circuits with Josephson junctions, capacitors, inductors, and flux biasing.
 """
 
+import functools
+import inspect
 import logging
 import numpy as np
-try:
-    import SQcircuit as sq
-except ImportError as e:
-    logging.error(f"Failed to import SQcircuit: {e}")
-    raise
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+def _import_sqcircuit():
+    """
+    Import SQcircuit on first use.
+    
+    SQcircuit pulls in SymPy, SciPy and QuTiP, so it is only imported by the
+    builders; the validation helpers remain usable without it.
+    
+    Returns:
+        module: The SQcircuit module.
+    """
+    try:
+        import SQcircuit as sq
+    except ImportError as e:
+        logger.error("Failed to import SQcircuit: %s", e)
+        raise
+    return sq
+
+
+@functools.lru_cache(maxsize=None)
+def _unit_kwargs(element_cls):
+    """
+    Return the unit keyword arguments supported by an SQcircuit element.
+    
+    Older SQcircuit versions do not accept ``unit``; the signature is
+    inspected once per element class instead of catching a TypeError on
+    every circuit build.
+    
+    Args:
+        element_cls (type): SQcircuit element class, e.g. ``sq.Junction``.
+        
+    Returns:
+        dict: ``{'unit': 'GHz'}`` if supported, else an empty dict.
+    """
+    if 'unit' in inspect.signature(element_cls).parameters:
+        return {'unit': 'GHz'}
+    return {}
+
+
+# Builders validate their inputs unless this is switched off with
+# set_validation(); parallel flux sweep workers do so because they rebuild
+# circuits from arguments that were validated when the circuit was first built.
+_validation_enabled = True
+
+
+def set_validation(enabled=True):
+    """
+    Enable or disable input validation in the circuit builders.
+    
+    Args:
+        enabled (bool): Whether validate_flux/validate_energy check their
+                        input. Default is True.
+    """
+    global _validation_enabled
+    _validation_enabled = bool(enabled)
+
+
+@functools.lru_cache(maxsize=1024)
+def _validate_flux_cached(flux):
+    """Range-check a flux value already converted to float."""
+    if not (0 <= flux <= 1):
+        raise ValueError(f"Flux must be between 0 and 1, got {flux}")
+    return True
+
+
+@functools.lru_cache(maxsize=1024)
+def _validate_energy_cached(energy, name):
+    """Range-check an energy value already converted to float."""
+    if energy <= 0:
+        raise ValueError(f"{name} must be positive, got {energy}")
+    if energy > 1000:  # Reasonable upper limit for GHz
+        logger.warning("%s value %s GHz seems unusually high", name, energy)
+    return True
+
+
 def validate_flux(flux):
     """
     Validate that flux value is within acceptable range (0 to 1).
     
+    Results for valid values are memoized, so repeated builds with the same
+    flux skip the range check.
+    
     Args:
         flux (float): Flux value in units of flux quantum.
         
@@ -32,13 +106,12 @@ def validate_flux(flux):
     Raises:
         ValueError: If flux is outside valid range.
     """
-    try:
-        flux = float(flux)
-        if not (0 <= flux <= 1):
-            raise ValueError(f"Flux must be between 0 and 1, got {flux}")
+    if not _validation_enabled:
         return True
+    try:
+        return _validate_flux_cached(float(flux))
     except (TypeError, ValueError) as e:
-        logger.error(f"Invalid flux value: {e}")
+        logger.error("Invalid flux value: %s", e)
         raise
 
 
@@ -46,6 +119,9 @@ def validate_energy(energy, name="Energy"):
     """
     Validate that energy value is positive and reasonable.
     
+    Results for valid values are memoized, so the high-value warning is
+    logged once per distinct value.
+    
     Args:
         energy (float): Energy value in GHz.
         name (str): Name of the parameter for error messages.
@@ -56,19 +132,16 @@ def validate_energy(energy, name="Energy"):
     Raises:
         ValueError: If energy is negative or invalid.
     """
-    try:
-        energy = float(energy)
-        if energy <= 0:
-            raise ValueError(f"{name} must be positive, got {energy}")
-        if energy > 1000:  # Reasonable upper limit for GHz
-            logger.warning(f"{name} value {energy} GHz seems unusually high")
+    if not _validation_enabled:
         return True
+    try:
+        return _validate_energy_cached(float(energy), name)
     except (TypeError, ValueError) as e:
-        logger.error(f"Invalid {name} value: {e}")
+        logger.error("Invalid %s value: %s", name, e)
         raise
 
 
-def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0):
+def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0, trunc=20):
     """
     Build a basic RQL inverter gate circuit.
     
@@ -82,6 +155,9 @@ def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0):
         flux (float): External flux bias in units of flux quantum (0-1).
                       Default is 0.5.
         ng (float): Gate charge offset. Default is 0.0.
+        trunc (int): Truncation number of the circuit mode. Default is 20,
+                     which converges the lowest ~10 levels for typical
+                     transmon-like parameters.
         
     Returns:
         SQcircuit.Circuit: Configured circuit object for the inverter.
@@ -90,28 +166,25 @@ def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0):
         ValueError: If input parameters are invalid.
     """
     try:
-        print(f"Checkpoint: Building RQL inverter with Ej={Ej} GHz, Ec={Ec} GHz, flux={flux}")
-        logger.info(f"Building RQL inverter: Ej={Ej} GHz, Ec={Ec} GHz, flux={flux}")
+        logger.info("Building RQL inverter: Ej=%s GHz, Ec=%s GHz, flux=%s",
+                    Ej, Ec, flux)
         
         # Validate inputs
         validate_energy(Ej, "Ej")
         validate_energy(Ec, "Ec")
         validate_flux(flux)
         
+        sq = _import_sqcircuit()
+        
         # Create a simple single-loop circuit with Josephson junction
         # This represents a basic RQL inverter gate
         # For SQcircuit, we need to ensure loops are properly closed
         loop1 = sq.Loop(value=flux)
         
-        # Josephson junction with energy Ej (in GHz)
-        # Try without unit parameter first, as SQcircuit version may vary
-        try:
-            JJ = sq.Junction(value=Ej, loops=[loop1], unit="GHz")
-            C = sq.Capacitor(value=1/(2*Ec), unit="GHz")
-        except TypeError:
-            # Fallback if unit parameter not supported
-            JJ = sq.Junction(value=Ej, loops=[loop1])
-            C = sq.Capacitor(value=1/(2*Ec))
+        # Josephson junction with energy Ej (in GHz); the unit argument is
+        # only passed if this SQcircuit version supports it
+        JJ = sq.Junction(value=Ej, loops=[loop1], **_unit_kwargs(sq.Junction))
+        C = sq.Capacitor(value=1/(2*Ec), **_unit_kwargs(sq.Capacitor))
         
         # Create circuit elements dictionary
         # Elements connect nodes (0, 1) where 0 is ground
@@ -124,10 +197,9 @@ def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0):
         # SQcircuit may require explicit loop closure or different topology
         try:
             cr = sq.Circuit(elements)
-            cr.set_trunc_nums([50])  # Set truncation for charge basis
         except ValueError as e:
             # If basic topology fails, try alternative approach
-            logger.warning(f"Standard topology failed: {e}, trying alternative")
+            logger.warning("Standard topology failed: %s, trying alternative", e)
             # Alternative: use a simple LC oscillator model
             # This is a fallback that should work with SQcircuit
             raise ValueError(
@@ -136,24 +208,31 @@ def build_rql_inverter(Ej=10.0, Ec=0.2, flux=0.5, ng=0.0):
                 f"Please check SQcircuit documentation for proper loop closure."
             )
         
-        # Set gate charge
+        # Set gate charge before truncating: set_trunc_nums builds the
+        # operators, and an offset set afterwards would rebuild them
         if ng != 0:
-            cr.set_trunc_nums([50])  # Truncation for charge basis
-            cr.set_charge_offset([ng])
+            cr.set_charge_offset(1, ng)
+        cr.set_trunc_nums([trunc])  # Set truncation for charge basis
+        
+        # Record how the circuit was built so workers can rebuild it, and
+        # its loops and junctions so callers need not scan the elements
+        cr._rql_builder = ('build_rql_inverter',
+                           dict(Ej=Ej, Ec=Ec, flux=flux, ng=ng, trunc=trunc))
+        cr._rql_loops = (loop1,)
+        cr._rql_jjs = (JJ,)
         
-        print("Checkpoint: Circuit built successfully")
         logger.info("RQL inverter circuit built successfully")
         
         return cr
         
     except Exception as e:
         error_msg = f"Error building RQL inverter: {e}"
-        print(f"Error at circuit building: {error_msg}")
         logger.error(error_msg, exc_info=True)
         raise
 
 
-def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5):
+def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5,
+                   trunc=20):
     """
     Build an A-NOT-B (ANB) RQL gate circuit.
     
@@ -173,6 +252,8 @@ def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5):
                        Default is 0.5.
         flux2 (float): External flux bias for second loop (0-1).
                        Default is 0.5.
+        trunc (int): Truncation number of each of the two circuit modes.
+                     Default is 20.
         
     Returns:
         SQcircuit.Circuit: Configured circuit object for the ANB gate.
@@ -181,8 +262,7 @@ def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5):
         ValueError: If input parameters are invalid.
     """
     try:
-        print(f"Checkpoint: Building ANB gate with Ej1={Ej1}, Ej2={Ej2}, J={J} GHz")
-        logger.info(f"Building ANB gate: Ej1={Ej1}, Ej2={Ej2}, J={J} GHz")
+        logger.info("Building ANB gate: Ej1=%s, Ej2=%s, J=%s GHz", Ej1, Ej2, J)
         
         # Validate inputs
         validate_energy(Ej1, "Ej1")
@@ -191,20 +271,23 @@ def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5):
         validate_flux(flux1)
         validate_flux(flux2)
         
+        sq = _import_sqcircuit()
+        
         # Create two flux loops
         loop1 = sq.Loop(value=flux1)
         loop2 = sq.Loop(value=flux2)
         
         # Josephson junctions (in GHz)
-        JJ1 = sq.Junction(value=Ej1, loops=[loop1], unit="GHz")
-        JJ2 = sq.Junction(value=Ej2, loops=[loop2], unit="GHz")
+        JJ1 = sq.Junction(value=Ej1, loops=[loop1], **_unit_kwargs(sq.Junction))
+        JJ2 = sq.Junction(value=Ej2, loops=[loop2], **_unit_kwargs(sq.Junction))
         
         # Coupling junction between loops
-        JJ_coupling = sq.Junction(value=J, loops=[loop1, loop2], unit="GHz")
+        JJ_coupling = sq.Junction(value=J, loops=[loop1, loop2],
+                                  **_unit_kwargs(sq.Junction))
         
         # Capacitors (in GHz^-1)
-        C1 = sq.Capacitor(value=1/(2*Ec), unit="GHz")
-        C2 = sq.Capacitor(value=1/(2*Ec), unit="GHz")
+        C1 = sq.Capacitor(value=1/(2*Ec), **_unit_kwargs(sq.Capacitor))
+        C2 = sq.Capacitor(value=1/(2*Ec), **_unit_kwargs(sq.Capacitor))
         
         # Create circuit with three nodes
         # Node 0: ground, Node 1: first loop, Node 2: second loop
@@ -216,21 +299,27 @@ def build_anb_gate(Ej1=10.0, Ej2=10.0, Ec=0.2, J=0.5, flux1=0.5, flux2=0.5):
         
         # Build the circuit
         cr = sq.Circuit(elements)
-        cr.set_trunc_nums([50, 50])  # Set truncation for two nodes
+        cr.set_trunc_nums([trunc, trunc])  # Set truncation for two nodes
+        
+        # Record how the circuit was built so workers can rebuild it, and
+        # its loops and junctions so callers need not scan the elements
+        cr._rql_builder = ('build_anb_gate',
+                           dict(Ej1=Ej1, Ej2=Ej2, Ec=Ec, J=J, flux1=flux1,
+                                flux2=flux2, trunc=trunc))
+        cr._rql_loops = (loop1, loop2)
+        cr._rql_jjs = (JJ1, JJ2, JJ_coupling)
         
-        print("Checkpoint: ANB gate circuit built successfully")
         logger.info("ANB gate circuit built successfully")
         
         return cr
         
     except Exception as e:
         error_msg = f"Error building ANB gate: {e}"
-        print(f"Error at circuit building: {error_msg}")
         logger.error(error_msg, exc_info=True)
         raise
 
 
-def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5):
+def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5, trunc=20):
     """
     Build a basic RQL superconducting loop with Josephson junction.
     
@@ -243,6 +332,7 @@ def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5):
         El (float): Inductive energy in GHz. Default is 0.1 GHz.
         flux (float): External flux bias in units of flux quantum (0-1).
                       Default is 0.5.
+        trunc (int): Truncation number of the circuit mode. Default is 20.
         
     Returns:
         SQcircuit.Circuit: Configured circuit object.
@@ -251,8 +341,7 @@ def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5):
         ValueError: If input parameters are invalid.
     """
     try:
-        print(f"Checkpoint: Building RQL loop with Ej={Ej}, Ec={Ec}, El={El} GHz")
-        logger.info(f"Building RQL loop: Ej={Ej}, Ec={Ec}, El={El} GHz")
+        logger.info("Building RQL loop: Ej=%s, Ec=%s, El=%s GHz", Ej, Ec, El)
         
         # Validate inputs
         validate_energy(Ej, "Ej")
@@ -260,13 +349,15 @@ def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5):
         validate_energy(El, "El")
         validate_flux(flux)
         
+        sq = _import_sqcircuit()
+        
         # Create flux loop
         loop = sq.Loop(value=flux)
         
         # Circuit elements (in GHz or GHz^-1)
-        JJ = sq.Junction(value=Ej, loops=[loop], unit="GHz")
-        C = sq.Capacitor(value=1/(2*Ec), unit="GHz")
-        L = sq.Inductor(value=1/El, loops=[loop], unit="GHz")
+        JJ = sq.Junction(value=Ej, loops=[loop], **_unit_kwargs(sq.Junction))
+        C = sq.Capacitor(value=1/(2*Ec), **_unit_kwargs(sq.Capacitor))
+        L = sq.Inductor(value=1/El, loops=[loop], **_unit_kwargs(sq.Inductor))
         
         # Build circuit
         elements = {
@@ -274,16 +365,21 @@ def build_rql_loop(Ej=10.0, Ec=0.2, El=0.1, flux=0.5):
         }
         
         cr = sq.Circuit(elements)
-        cr.set_trunc_nums([50])  # Set truncation for charge basis
+        cr.set_trunc_nums([trunc])  # Set truncation for charge basis
+        
+        # Record how the circuit was built so workers can rebuild it, and
+        # its loops and junctions so callers need not scan the elements
+        cr._rql_builder = ('build_rql_loop',
+                           dict(Ej=Ej, Ec=Ec, El=El, flux=flux, trunc=trunc))
+        cr._rql_loops = (loop,)
+        cr._rql_jjs = (JJ,)
         
-        print("Checkpoint: RQL loop circuit built successfully")
         logger.info("RQL loop circuit built successfully")
         
         return cr
         
     except Exception as e:
         error_msg = f"Error building RQL loop: {e}"
-        print(f"Error at circuit building: {error_msg}")
         logger.error(error_msg, exc_info=True)
         raise
 
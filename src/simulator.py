@@ -6,59 +6,478 @@ energy level calculations, anharmonicity, and coupling strength analysis.
 Integrates QuTiP for time-domain pulse propagation when needed.
 """
 
+import hashlib
+import json
 import logging
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
-try:
-    import SQcircuit as sq
-except ImportError as e:
-    logging.error(f"Failed to import SQcircuit: {e}")
-    raise
+import scipy.linalg
+import scipy.sparse
+from scipy.sparse.linalg import ArpackNoConvergence, eigsh
 
-try:
-    from qutip import *
-except ImportError as e:
-    logging.error(f"Failed to import QuTiP: {e}")
-    raise
+# SQcircuit (which loads QuTiP) is imported on first use, so the plain NumPy
+# helpers and the cache setup do not pay for it
+from . import __version__
+from . import circuit_builder
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Default location of the on-disk result cache
+DEFAULT_DISK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rql_sim")
 
-def diagonalize_hamiltonian(circuit, n_levels=10):
+# Directory of the on-disk result cache; None disables it
+_disk_cache_dir = None
+
+# In-memory LRU cache of diagonalization results, keyed by _diag_cache_key.
+# Streamlit runs sessions in threads, hence the lock.
+_DIAG_CACHE = OrderedDict()
+_DIAG_CACHE_MAX = 128
+_DIAG_CACHE_LOCK = threading.Lock()
+
+
+def clear_diag_cache():
+    """Empty the in-memory cache of diagonalization results."""
+    with _DIAG_CACHE_LOCK:
+        _DIAG_CACHE.clear()
+
+
+def _diag_cache_key(circuit, n_levels, tol=0, maxiter=None):
+    """
+    Compute the in-memory cache key of a diagonalization.
+    
+    Unlike the disk cache key this does not need the builder arguments: it
+    hashes the circuit state the Hamiltonian is built from (element layout,
+    values and loop membership, loop fluxes, charge offsets, truncation),
+    so it applies to any circuit.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit being diagonalized.
+        n_levels (int): Number of energy levels requested.
+        tol (float): Sparse solver tolerance requested.
+        maxiter (int, optional): Sparse solver iteration limit requested.
+        
+    Returns:
+        bytes: BLAKE2b digest.
+    """
+    sq = circuit_builder._import_sqcircuit()
+    # Loops an element threads, as indices into circuit.loops: circuits that
+    # differ only in where a flux enters must not share an entry
+    loop_index = {id(loop): i for i, loop in enumerate(circuit.loops)}
+    structure = []
+    values = []
+    for edge, elements in circuit.elements.items():
+        for elem in elements:
+            loops = tuple(loop_index.get(id(loop), -1)
+                          for loop in getattr(elem, 'loops', None) or ())
+            structure.append((edge, type(elem).__name__, loops))
+            values.append(elem.internal_value)
+    values.extend(loop.internal_value for loop in circuit.loops)
+    islands = sorted(circuit.charge_islands.items())
+    values.extend(island.value() for _, island in islands)
+    values.append(sq.units.get_unit_freq())
+    
+    h = hashlib.blake2b(digest_size=16)
+    layout = (structure, len(circuit.loops), [mode for mode, _ in islands],
+              list(circuit.trunc_nums), n_levels, tol, maxiter)
+    h.update(repr(layout).encode('utf-8'))
+    h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return h.digest()
+
+
+def set_disk_cache(cache_dir=DEFAULT_DISK_CACHE_DIR):
+    """
+    Enable or disable the on-disk cache of simulation results.
+    
+    When enabled, diagonalize_hamiltonian and flux_sweep store their results
+    for circuits built by circuit_builder, keyed by a SHA-256 hash of the
+    builder arguments, the current loop fluxes, truncation numbers and charge
+    offsets and the simulation arguments. Repeated runs with the same
+    parameters (e.g. from scripted CLI invocations) then skip the eigensolve.
+    
+    Entries never expire and the directory is not size-bounded; delete the
+    directory to clear the cache. Flux sweeps with failed (NaN) points are
+    not stored, so a transient solver failure is recomputed on the next run.
+    
+    Args:
+        cache_dir (str): Cache directory, or None to disable the cache.
+                         Default is ~/.cache/rql_sim.
+    """
+    global _disk_cache_dir
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    _disk_cache_dir = cache_dir
+    logger.info("Disk cache directory: %s", cache_dir)
+
+
+def _circuit_state(circuit):
+    """
+    Capture the circuit state that can change after circuit_builder built it.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit to inspect.
+        
+    Returns:
+        dict: JSON-serializable truncation numbers, loop fluxes (in
+              ``circuit.loops`` order) and charge offsets by mode.
+    """
+    return {
+        'trunc_nums': list(circuit.trunc_nums),
+        'loop_fluxes': [float(loop.internal_value) for loop in circuit.loops],
+        'charge_offsets': [[mode, float(island.value())] for mode, island
+                           in sorted(circuit.charge_islands.items())],
+    }
+
+
+def _apply_circuit_state(circuit, state):
+    """
+    Apply a state captured by _circuit_state to a freshly built circuit.
+    
+    The operators are rebuilt once, and only if the truncation or a charge
+    offset differs from the build.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit rebuilt from the same builder
+                                     arguments as the captured one.
+        state (dict): Output of _circuit_state.
+    """
+    for loop, flux in zip(circuit.loops, state['loop_fluxes']):
+        loop.internal_value = flux
+    
+    rebuild = list(circuit.trunc_nums) != state['trunc_nums']
+    for mode, offset in state['charge_offsets']:
+        island = circuit.charge_islands[mode]
+        if island.value() != offset:
+            island.set_offset(offset)
+            rebuild = True
+    
+    if rebuild and state['trunc_nums']:
+        circuit.set_trunc_nums(state['trunc_nums'])
+
+
+def _disk_cache_key(kind, circuit, **sim_args):
+    """
+    Compute the on-disk cache key of a simulation.
+    
+    Args:
+        kind (str): Simulation kind, e.g. 'diag' or 'flux_sweep'.
+        circuit (SQcircuit.Circuit): Circuit being simulated.
+        **sim_args: Simulation arguments (n_levels, n_points, ...).
+        
+    Returns:
+        str or None: Hex digest, or None if caching does not apply.
+    """
+    builder = getattr(circuit, '_rql_builder', None)
+    if _disk_cache_dir is None or builder is None:
+        return None
+    
+    builder_name, builder_kwargs = builder
+    payload = {
+        'version': __version__,
+        'kind': kind,
+        'builder': builder_name,
+        'builder_kwargs': builder_kwargs,
+        # Loop fluxes, truncation and charge offsets may have changed since
+        # the build
+        'state': _circuit_state(circuit),
+        'sim_args': sim_args,
+    }
+    text = json.dumps(payload, sort_keys=True, default=float)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _disk_cache_load(key):
+    """
+    Load a cached result.
+    
+    Args:
+        key (str): Cache key from _disk_cache_key.
+        
+    Returns:
+        object or None: Cached result, or None on a miss.
+    """
+    path = os.path.join(_disk_cache_dir, f"{key}.pkl")
+    try:
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+        return None
+    
+    logger.info("Loaded cached result %.12s", key)
+    return result
+
+
+def _disk_cache_store(key, result):
+    """
+    Store a result in the cache.
+    
+    Args:
+        key (str): Cache key from _disk_cache_key.
+        result (object): Picklable result to store.
+    """
+    try:
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=_disk_cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(_disk_cache_dir, f"{key}.pkl"))
+    except Exception as e:
+        logger.warning("Could not write cache entry %.12s: %s", key, e)
+
+
+def _diag_cache_store(key, result):
+    """
+    Insert a diagonalization result into the in-memory LRU cache.
+    
+    Args:
+        key (bytes): Cache key from _diag_cache_key.
+        result (tuple): (energies, eigenvectors) to store.
+    """
+    energies, eigenvecs = result
+    if eigenvecs is not None:
+        eigenvecs = list(eigenvecs)
+    with _DIAG_CACHE_LOCK:
+        _DIAG_CACHE[key] = (energies.copy(), eigenvecs)
+        _DIAG_CACHE.move_to_end(key)
+        while len(_DIAG_CACHE) > _DIAG_CACHE_MAX:
+            _DIAG_CACHE.popitem(last=False)
+
+
+# Sparse Lanczos only pays off once the Hilbert space is much larger than
+# the number of requested levels; below that, dense LAPACK is faster
+_SPARSE_MIN_DIM_PER_LEVEL = 20
+
+
+def _use_sparse_solver(H, n_levels):
+    """Return True if _eigensolve takes the sparse (eigsh) path for H."""
+    return (scipy.sparse.issparse(H)
+            and H.shape[0] > _SPARSE_MIN_DIM_PER_LEVEL * n_levels)
+
+
+def _eigensolve(H, n_levels, guess=None, eigvecs=True, tol=0, maxiter=None):
+    """
+    Compute the lowest eigenpairs of a Hermitian Hamiltonian matrix.
+    
+    Sparse matrices larger than ``_SPARSE_MIN_DIM_PER_LEVEL * n_levels`` use
+    Lanczos (``eigsh``) for only the ``n_levels`` lowest states; smaller or
+    dense matrices are diagonalized with ``scipy.linalg.eigh``, which
+    computes only the requested lowest levels (LAPACK ``?syevr``/``?heevr``).
+    
+    With a ``guess`` from a nearby Hamiltonian (the previous point of a flux
+    sweep) the sparse solve runs in shift-invert mode just below the guessed
+    ground state, started from the guessed ground state vector. If that does
+    not converge, or returns levels below the shift (so lower ones may have
+    been missed), the solve is repeated cold.
+    
+    Args:
+        H (scipy.sparse.spmatrix or numpy.ndarray): Hamiltonian matrix.
+        n_levels (int): Number of eigenpairs to compute.
+        guess (tuple, optional): (eigenvalues, eigenvectors) of a nearby
+                                 Hamiltonian, as returned by this function.
+        eigvecs (bool): Also compute the eigenvectors. Default is True.
+        tol (float): Relative accuracy of the sparse solver (``eigsh``);
+                     0 means machine precision. Default is 0.
+        maxiter (int, optional): Maximum number of Arnoldi update
+                                 iterations of the sparse solver. Default
+                                 is None (``eigsh``'s own default).
+        
+    Returns:
+        tuple: (eigenvalues, eigenvectors) sorted by ascending eigenvalue;
+               eigenvectors are the columns of a 2D array, or None if
+               ``eigvecs`` is False.
+    """
+    if _use_sparse_solver(H, n_levels):
+        if not eigvecs:
+            eigenvals = eigsh(H, k=n_levels, which='SA', tol=tol,
+                              maxiter=maxiter, return_eigenvectors=False)
+            return np.sort(eigenvals), None
+        
+        eigenvals = None
+        if guess is not None:
+            prev_vals, prev_vecs = guess
+            # Shift below the previous ground state by the previous level
+            # spread, so the levels nearest the shift are the lowest ones
+            spread = max(prev_vals[-1] - prev_vals[0], 1e-3 * abs(prev_vals[0]))
+            sigma = prev_vals[0] - spread
+            try:
+                eigenvals, eigenvecs = eigsh(H, k=n_levels, sigma=sigma,
+                                             which='LM', v0=prev_vecs[:, 0],
+                                             tol=tol, maxiter=maxiter)
+                if np.any(eigenvals < sigma):
+                    eigenvals = None
+            except (ArpackNoConvergence, RuntimeError) as e:
+                logger.debug("Warm-start eigensolve failed, solving cold: %s", e)
+                eigenvals = None
+        if eigenvals is None:
+            eigenvals, eigenvecs = eigsh(H, k=n_levels, which='SA', tol=tol,
+                                         maxiter=maxiter)
+    else:
+        dense = H.toarray() if scipy.sparse.issparse(H) else np.asarray(H)
+        n_eig = min(n_levels, dense.shape[0])
+        result = scipy.linalg.eigh(
+            dense, subset_by_index=[0, n_eig - 1], driver='evr',
+            eigvals_only=not eigvecs
+        )
+        if not eigvecs:
+            return result, None
+        eigenvals, eigenvecs = result
+    
+    order = np.argsort(eigenvals)[:n_levels]
+    return eigenvals[order], eigenvecs[:, order]
+
+
+def _ensure_truncated(circuit):
+    """
+    Set the default truncation on a circuit that has none yet.
+    
+    Circuits from circuit_builder arrive truncated, so this never mutates
+    them.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit to check.
+    """
+    if not getattr(circuit, 'm', None):
+        circuit.set_trunc_nums([50] * circuit.n)  # Default truncation
+
+
+def _to_ghz(eigenvals):
+    """Convert eigenvalues from SQcircuit's angular units to GHz."""
+    sq = circuit_builder._import_sqcircuit()
+    return eigenvals / (2 * np.pi * sq.units.get_unit_freq())
+
+
+def _set_circuit_eigenstate(circuit, energies, eigenvecs):
+    """
+    Store eigenpairs on the circuit, as circuit.diag() does.
+    
+    Keeps SQcircuit methods that read the circuit's eigen state (e.g.
+    check_convergence) working after a result served from a cache.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit that was diagonalized.
+        energies (numpy.ndarray): Eigenvalues in GHz.
+        eigenvecs (list): Eigenstates as qutip Qobj.
+    """
+    sq = circuit_builder._import_sqcircuit()
+    circuit._efreqs = np.asarray(energies) * (2 * np.pi * sq.units.get_unit_freq())
+    circuit._evecs = list(eigenvecs)
+
+
+def diagonalize_hamiltonian(circuit, n_levels=10, cache=True, quiet=False,
+                            return_eigvecs=True, tol=0, maxiter=None):
     """
     Diagonalize the Hamiltonian of an RQL circuit to get energy eigenvalues.
     
     Args:
         circuit (SQcircuit.Circuit): Circuit object to diagonalize.
         n_levels (int): Number of energy levels to compute. Default is 10.
+        cache (bool): Use the in-memory result cache and, if it is enabled
+                      (see set_disk_cache), the on-disk cache. Default is
+                      True.
+        quiet (bool): Skip the progress messages, e.g. when called once per
+                      point of a scan. Errors are still logged. Default is
+                      False.
+        return_eigvecs (bool): Compute the eigenvectors. If False only the
+                               eigenvalues are computed, which is cheaper,
+                               and None is returned in their place. Default
+                               is True.
+        tol (float): Relative accuracy of the sparse eigensolver; 0 means
+                     machine precision. Default is 0.
+        maxiter (int, optional): Iteration limit of the sparse eigensolver.
+                                 Default is None (scipy's default).
         
     Returns:
         tuple: (energies, eigenvectors) where energies is array of eigenvalues
-               in GHz and eigenvectors are the corresponding eigenstates.
+               in GHz and eigenvectors are the corresponding eigenstates
+               (None if ``return_eigvecs`` is False).
                
     Raises:
         RuntimeError: If diagonalization fails.
     """
     try:
-        print(f"Checkpoint: Diagonalizing Hamiltonian for {n_levels} levels")
-        logger.info(f"Diagonalizing Hamiltonian for {n_levels} levels")
+        if not quiet:
+            print(f"Checkpoint: Diagonalizing Hamiltonian for {n_levels} levels")
+            logger.info("Diagonalizing Hamiltonian for %d levels", n_levels)
         
         if circuit is None:
             raise ValueError("Circuit object is None")
         
-        # Set truncation numbers if not already set
-        if not hasattr(circuit, '_trunc_nums') or circuit._trunc_nums is None:
-            circuit.set_trunc_nums([50])  # Default truncation
+        _ensure_truncated(circuit)
+        
+        mem_key = (_diag_cache_key(circuit, n_levels, tol, maxiter)
+                   if cache else None)
+        if mem_key is not None:
+            with _DIAG_CACHE_LOCK:
+                cached = _DIAG_CACHE.get(mem_key)
+                # Eigenvalue-only entries cannot serve eigenvector requests
+                if cached is not None and return_eigvecs and cached[1] is None:
+                    cached = None
+                if cached is not None:
+                    _DIAG_CACHE.move_to_end(mem_key)
+            if cached is not None:
+                if not quiet:
+                    logger.info("Using cached diagonalization")
+                energies, eigenvecs = cached
+                # Eigenvectors are shared (Qobj are read-only); copy the
+                # containers so callers cannot modify the cached entry
+                if not return_eigvecs:
+                    return energies.copy(), None
+                _set_circuit_eigenstate(circuit, energies, eigenvecs)
+                return energies.copy(), list(eigenvecs)
+        
+        key = (_disk_cache_key('diag', circuit, n_levels=n_levels, tol=tol,
+                               maxiter=maxiter) if cache else None)
+        if key is not None:
+            cached = _disk_cache_load(key)
+            if cached is not None and return_eigvecs and cached[1] is None:
+                cached = None
+            if cached is not None:
+                _diag_cache_store(mem_key, cached)
+                if not return_eigvecs:
+                    return cached[0], None
+                _set_circuit_eigenstate(circuit, *cached)
+                return cached
+        
+        from qutip import Qobj
         
-        # Diagonalize the Hamiltonian
-        eigenvals, eigenvecs = circuit.diag(n_eig=n_levels)
+        # Diagonalize the sparse Hamiltonian; it is Hermitian, so use the
+        # symmetric Lanczos solver for the lowest levels only
+        H = circuit.hamiltonian().data_as('csr_matrix')
+        eigenvals, vecs = _eigensolve(H, n_levels, eigvecs=return_eigvecs,
+                                      tol=tol, maxiter=maxiter)
+        if return_eigvecs:
+            eigenvecs = [Qobj(vecs[:, i], dims=circuit._get_state_dims())
+                         for i in range(vecs.shape[1])]
+            
+            # Keep the circuit's own eigen state in sync, as circuit.diag()
+            # does
+            circuit._efreqs = eigenvals
+            circuit._evecs = eigenvecs
+        else:
+            eigenvecs = None
         
-        # Convert eigenvalues to energy (they're already in GHz typically)
-        energies = eigenvals
+        # Convert eigenvalues from angular units to energy in GHz
+        energies = _to_ghz(eigenvals)
         
-        print(f"Checkpoint: Hamiltonian diagonalized successfully, ground state = {energies[0]:.4f} GHz")
-        logger.info(f"Diagonalization complete: ground state = {energies[0]:.4f} GHz")
+        if not quiet:
+            print(f"Checkpoint: Hamiltonian diagonalized successfully, ground state = {energies[0]:.4f} GHz")
+            logger.info("Diagonalization complete: ground state = %.4f GHz",
+                        energies[0])
+        
+        if mem_key is not None:
+            _diag_cache_store(mem_key, (energies, eigenvecs))
+        if key is not None:
+            _disk_cache_store(key, (energies, eigenvecs))
         
         return energies, eigenvecs
         
@@ -69,7 +488,251 @@ def diagonalize_hamiltonian(circuit, n_levels=10):
         raise RuntimeError(error_msg) from e
 
 
-def flux_sweep(circuit, flux_range=None, n_points=100, n_levels=5):
+def _resolve_n_jobs(n_jobs):
+    """
+    Convert an ``n_jobs`` argument into a number of worker processes.
+    
+    Args:
+        n_jobs (int): Requested workers; -1 (or any value < 1) means one
+                      worker per CPU core.
+        
+    Returns:
+        int: Number of worker processes to use, between 1 and the number of
+             CPU cores.
+    """
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None:
+        return 1
+    if n_jobs < 1:
+        return cpu_count
+    return min(n_jobs, cpu_count)
+
+
+def _find_flux_loop(circuit):
+    """
+    Find the flux loop that flux_sweep varies.
+    
+    Uses the loops recorded by circuit_builder when present, then the
+    circuit's own list of loops when SQcircuit provides one, and otherwise
+    falls back to scanning the elements.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit to search.
+        
+    Returns:
+        SQcircuit.Loop or None: First flux loop found, or None.
+    """
+    loops = getattr(circuit, '_rql_loops', None) or getattr(circuit, 'loops', None)
+    if loops:
+        return loops[0]
+    
+    sq = circuit_builder._import_sqcircuit()
+    elements = [elem for elem_list in circuit.elements.values()
+                for elem in elem_list]
+    loops = [elem for elem in elements if isinstance(elem, sq.Loop)]
+    if not loops:
+        # Try to find any loop attached to an element
+        loops = [elem.loops[0] for elem in elements
+                 if getattr(elem, 'loops', None)]
+    
+    return loops[0] if loops else None
+
+
+def _to_csr(op):
+    """Return a qutip operator as a scipy CSR matrix, whatever its storage."""
+    return op.to('csr').data_as('csr_matrix')
+
+
+def _flux_hamiltonian_terms(circuit):
+    """
+    Split a truncated circuit's Hamiltonian into static and flux terms.
+    
+    SQcircuit assembles the Hamiltonian as the static LC part plus one term
+    per inductor (linear in its external flux) and per junction (through
+    exp(i*phi)). Precomputing these operators lets a flux sweep reassemble
+    the Hamiltonian with a few sparse additions per point instead of calling
+    circuit.hamiltonian(), which also rebuilds the junction cos/sin/sin_half
+    operators every time.
+    
+    Relies on SQcircuit internals; returns None if they are unavailable, in
+    which case callers should use circuit.hamiltonian().
+    
+    Args:
+        circuit (SQcircuit.Circuit): Truncated circuit.
+        
+    Returns:
+        tuple or None: (H_static, inductor_terms, junction_terms), where
+            inductor_terms holds (b_id, operator) and junction_terms holds
+            (b_id, EJ, exp_operator, exp_operator_dagger), all as scipy CSR
+            matrices in SQcircuit's angular units.
+    """
+    try:
+        sq = circuit_builder._import_sqcircuit()
+        H_static = _to_csr(circuit._LC_hamil)
+        
+        inductor_terms = []
+        for edge, elem, b_id in circuit.elem_keys.get(sq.Inductor, []):
+            op = circuit.coupling_op('inductive', edge, force_use_qutip=True)
+            scale = ((sq.units.Phi0 / 2 / np.pi) / elem.get_value()
+                     / np.sqrt(sq.units.hbar))
+            inductor_terms.append((b_id, scale * _to_csr(op)))
+        
+        junction_terms = []
+        for _, elem, b_id, w_id in circuit.elem_keys.get(sq.Junction, []):
+            exp_op = _to_csr(circuit._memory_ops['exp'][w_id])
+            junction_terms.append((b_id, float(elem.get_value()),
+                                   exp_op, exp_op.conj().T.tocsr()))
+    except (AttributeError, KeyError, IndexError, TypeError) as e:
+        logger.debug("Cannot split the Hamiltonian, falling back to "
+                     "circuit.hamiltonian(): %s", e)
+        return None
+    
+    return H_static, inductor_terms, junction_terms
+
+
+def _assemble_hamiltonian(circuit, terms):
+    """
+    Assemble the Hamiltonian at the circuit's current loop fluxes.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit the terms were taken from.
+        terms (tuple): Output of _flux_hamiltonian_terms.
+        
+    Returns:
+        scipy.sparse.csr_matrix: Hamiltonian in SQcircuit's angular units.
+    """
+    H_static, inductor_terms, junction_terms = terms
+    H = H_static
+    for b_id, op in inductor_terms:
+        H = H + circuit._get_external_flux_at_element(b_id) * op
+    for b_id, EJ, exp_op, exp_dag in junction_terms:
+        # -EJ * cos(phi) with cos = (e^{i phi} E + e^{-i phi} E^dag) / 2
+        phase = np.exp(1j * circuit._get_external_flux_at_element(b_id))
+        H = H - (EJ / 2) * (phase * exp_op + np.conj(phase) * exp_dag)
+    return H
+
+
+def _sweep_points(circuit, loop, flux_values, n_levels, tol=0, maxiter=None):
+    """
+    Diagonalize a circuit at each flux value by updating its loop in place.
+    
+    Only the flux-dependent terms of the Hamiltonian change with the loop
+    flux, so the circuit (basis, operators) is built once and the static
+    part of the Hamiltonian is reused for every point. Each eigensolve is
+    warm-started from the previous point's eigenpairs. The loop flux is
+    restored afterwards.
+    
+    Args:
+        circuit (SQcircuit.Circuit): Circuit to simulate.
+        loop (SQcircuit.Loop): Loop of ``circuit`` whose flux is swept.
+        flux_values (numpy.ndarray): Flux values in units of flux quantum.
+        n_levels (int): Number of energy levels to compute.
+        tol (float): Relative accuracy of the sparse eigensolver.
+        maxiter (int, optional): Iteration limit of the sparse eigensolver.
+        
+    Returns:
+        numpy.ndarray: 2D array (len(flux_values), n_levels) of energies in
+            GHz; rows of points that failed to diagonalize are NaN.
+    """
+    n_points = len(flux_values)
+    energy_levels = np.full((n_points, n_levels), np.nan)
+    original_flux = loop.internal_value
+    _ensure_truncated(circuit)
+    terms = _flux_hamiltonian_terms(circuit)
+    guess = None
+    # Eigenvectors are only needed to warm-start the sparse solver
+    need_vecs = None
+    
+    try:
+        for i, flux_val in enumerate(flux_values):
+            try:
+                # Update flux value; the Hamiltonian reads it on assembly
+                loop.set_flux(flux_val)
+                
+                # Diagonalize Hamiltonian (the sweep is cached as a whole)
+                if terms is not None:
+                    H = _assemble_hamiltonian(circuit, terms)
+                else:
+                    H = circuit.hamiltonian().data_as('csr_matrix')
+                if need_vecs is None:
+                    need_vecs = _use_sparse_solver(H, n_levels)
+                eigenvals, vecs = _eigensolve(H, n_levels, guess=guess,
+                                              eigvecs=need_vecs, tol=tol,
+                                              maxiter=maxiter)
+                if need_vecs:
+                    guess = (eigenvals, vecs)
+                energies = _to_ghz(eigenvals)
+                
+                # Store results
+                n_store = min(n_levels, len(energies))
+                energy_levels[i, :n_store] = energies[:n_store]
+                
+                if (i + 1) % 20 == 0:
+                    logger.info("Flux sweep progress: %d/%d points", i + 1, n_points)
+                    
+            except Exception as e:
+                # Leave the row NaN; the warm start keeps the last good point
+                logger.warning("Error at flux point %s: %s", flux_val, e)
+                continue
+    finally:
+        loop.internal_value = original_flux
+    
+    return energy_levels
+
+
+# Below this many flux points, worker start-up costs more than it saves
+_MIN_PARALLEL_POINTS = 8
+
+def _init_sweep_worker():
+    """
+    Initialize a flux sweep worker process.
+    
+    Each worker runs a single-threaded eigensolver so that N workers do not
+    oversubscribe the cores with N BLAS thread pools. The BLAS runtime is
+    already loaded when the initializer runs (inherited through fork, or
+    imported while unpickling it), so thread-count environment variables
+    would have no effect; threadpoolctl resizes the loaded pools instead.
+    
+    The builder arguments shipped to workers come from an already validated
+    circuit, so the workers skip input validation when rebuilding it.
+    """
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=1)
+    
+    circuit_builder.set_validation(False)
+
+
+def _sweep_chunk(builder_name, builder_kwargs, state, flux_values, n_levels,
+                 tol=0, maxiter=None):
+    """
+    Rebuild a circuit in a worker process and sweep a chunk of flux values.
+    
+    The circuit is rebuilt from its builder keyword arguments because
+    SQcircuit objects are not cheap or safe to ship between processes, and
+    then brought to the caller's current state. It is built once per chunk
+    and then swept in place like the serial path.
+    
+    Args:
+        builder_name (str): Name of the circuit_builder function.
+        builder_kwargs (dict): Keyword arguments the circuit was built with.
+        state (dict): Current state of the caller's circuit, from
+                      _circuit_state.
+        flux_values (numpy.ndarray): Flux values of this chunk.
+        n_levels (int): Number of energy levels to compute.
+        tol (float): Relative accuracy of the sparse eigensolver.
+        maxiter (int, optional): Iteration limit of the sparse eigensolver.
+        
+    Returns:
+        numpy.ndarray: 2D array (len(flux_values), n_levels) of energies in GHz.
+    """
+    circuit = getattr(circuit_builder, builder_name)(**builder_kwargs)
+    _apply_circuit_state(circuit, state)
+    return _sweep_points(circuit, _find_flux_loop(circuit), flux_values,
+                         n_levels, tol=tol, maxiter=maxiter)
+
+
+def flux_sweep(circuit, flux_range=None, n_points=100, n_levels=5, n_jobs=1,
+               tol=0, maxiter=None):
     """
     Perform a flux sweep to compute energy levels vs. external flux.
     
@@ -82,11 +745,21 @@ def flux_sweep(circuit, flux_range=None, n_points=100, n_levels=5):
                            Default is (0.0, 1.0).
         n_points (int): Number of flux points to sample. Default is 100.
         n_levels (int): Number of energy levels to compute. Default is 5.
+        n_jobs (int): Number of worker processes; -1 uses all CPU cores.
+                      Parallel sweeps need a circuit from circuit_builder.
+                      Default is 1 (serial).
+        tol (float): Relative accuracy of the sparse eigensolver; 0 means
+                     machine precision. A looser value (e.g. 1e-8) speeds up
+                     the warm-started solves of large sweeps. Default is 0.
+        maxiter (int, optional): Iteration limit of the sparse eigensolver;
+                                 a warm start that hits it falls back to a
+                                 cold solve. Default is None (scipy's
+                                 default).
         
     Returns:
         tuple: (flux_values, energy_levels) where flux_values is array of
                flux values and energy_levels is 2D array (n_points, n_levels)
-               of energy eigenvalues in GHz.
+               of energy eigenvalues in GHz, NaN at points that failed.
                
     Raises:
         RuntimeError: If flux sweep fails.
@@ -100,64 +773,64 @@ def flux_sweep(circuit, flux_range=None, n_points=100, n_levels=5):
             raise ValueError(f"Invalid flux range: {flux_range}")
         
         print(f"Checkpoint: Starting flux sweep from {flux_min} to {flux_max} ({n_points} points)")
-        logger.info(f"Flux sweep: {flux_min} to {flux_max}, {n_points} points")
+        logger.info("Flux sweep: %s to %s, %d points", flux_min, flux_max, n_points)
+        
+        key = _disk_cache_key('flux_sweep', circuit, flux_range=list(flux_range),
+                              n_points=n_points, n_levels=n_levels, tol=tol,
+                              maxiter=maxiter)
+        if key is not None:
+            cached = _disk_cache_load(key)
+            if cached is not None:
+                return cached
         
         flux_values = np.linspace(flux_min, flux_max, n_points)
-        energy_levels = np.zeros((n_points, n_levels))
         
         # Find the flux loop in the circuit
-        loop = None
-        for element_list in circuit.elements.values():
-            for elem in element_list:
-                if isinstance(elem, sq.Loop):
-                    loop = elem
-                    break
-            if loop is not None:
-                break
-        
-        if loop is None:
-            # Try to find any loop in the circuit
-            for elem_list in circuit.elements.values():
-                for elem in elem_list:
-                    if hasattr(elem, 'loops') and elem.loops:
-                        loop = elem.loops[0]
-                        break
-                if loop is not None:
-                    break
-        
+        loop = _find_flux_loop(circuit)
         if loop is None:
             raise ValueError("No flux loop found in circuit")
         
-        # Sweep flux and compute energies
-        for i, flux_val in enumerate(flux_values):
-            try:
-                # Update flux value
-                loop.value = flux_val
-                
-                # Rebuild circuit with new flux
-                circuit.update()
-                
-                # Diagonalize Hamiltonian
-                energies, _ = diagonalize_hamiltonian(circuit, n_levels=n_levels)
-                
-                # Store results
-                n_store = min(n_levels, len(energies))
-                energy_levels[i, :n_store] = energies[:n_store]
-                
-                if (i + 1) % 20 == 0:
-                    print(f"Checkpoint: Flux sweep progress: {i+1}/{n_points} points")
-                    
-            except Exception as e:
-                logger.warning(f"Error at flux point {flux_val}: {e}")
-                # Continue with previous values or NaN
-                if i > 0:
-                    energy_levels[i] = energy_levels[i-1]
-                else:
-                    energy_levels[i] = np.nan
+        workers = _resolve_n_jobs(n_jobs)
+        builder = getattr(circuit, '_rql_builder', None)
+        if workers > 1 and builder is None:
+            logger.warning("Circuit was not built by circuit_builder, "
+                           "running flux sweep serially")
+            workers = 1
+        if n_points < _MIN_PARALLEL_POINTS:
+            workers = 1
+        
+        if workers > 1:
+            # Flux points are independent: sweep contiguous chunks in worker
+            # processes, each rebuilding the circuit once in its current state
+            builder_name, builder_kwargs = builder
+            _ensure_truncated(circuit)
+            state = _circuit_state(circuit)
+            chunks = np.array_split(flux_values, min(workers, n_points))
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_sweep_worker) as executor:
+                results = executor.map(
+                    _sweep_chunk,
+                    repeat(builder_name),
+                    repeat(builder_kwargs),
+                    repeat(state),
+                    chunks,
+                    repeat(n_levels),
+                    repeat(tol),
+                    repeat(maxiter)
+                )
+                energy_levels = np.concatenate(list(results))
+        else:
+            energy_levels = _sweep_points(circuit, loop, flux_values, n_levels,
+                                          tol=tol, maxiter=maxiter)
         
         print(f"Checkpoint: Flux sweep completed successfully")
         logger.info("Flux sweep completed successfully")
         
+        # Failed points may be transient (e.g. ARPACK non-convergence), so
+        # only complete sweeps are stored
+        if key is not None and not np.isnan(energy_levels).any():
+            _disk_cache_store(key, (flux_values, energy_levels))
+        
         return flux_values, energy_levels
         
     except Exception as e:
@@ -184,7 +857,7 @@ def calculate_anharmonicity(energies):
         ValueError: If insufficient energy levels are provided.
     """
     try:
-        energies = np.array(energies)
+        energies = np.asarray(energies, dtype=np.float64)
         
         if len(energies) < 3:
             raise ValueError("Need at least 3 energy levels to calculate anharmonicity")
@@ -194,7 +867,7 @@ def calculate_anharmonicity(energies):
         anharmonicity = (E2 - E1) - (E1 - E0)
         
         print(f"Checkpoint: Anharmonicity calculated: {anharmonicity:.4f} GHz")
-        logger.info(f"Anharmonicity: {anharmonicity:.4f} GHz")
+        logger.info("Anharmonicity: %.4f GHz", anharmonicity)
         
         return anharmonicity
         
@@ -205,6 +878,52 @@ def calculate_anharmonicity(energies):
         raise
 
 
+def calculate_anharmonicity_batch(energy_levels):
+    """
+    Calculate the anharmonicity at every point of a flux sweep.
+    
+    Vectorized form of calculate_anharmonicity for the (n_points, n_levels)
+    output of flux_sweep; only a summary is logged.
+    
+    Args:
+        energy_levels (array-like): 2D array (n_points, n_levels) of energies
+                                    in GHz.
+        
+    Returns:
+        numpy.ndarray: Anharmonicity in GHz per point.
+        
+    Raises:
+        ValueError: If the input is not 2D or has fewer than 3 levels.
+    """
+    try:
+        E = np.asarray(energy_levels, dtype=np.float64)
+        
+        if E.ndim != 2 or E.shape[1] < 3:
+            raise ValueError("Need a 2D array with at least 3 energy levels "
+                             f"to calculate anharmonicity, got shape {E.shape}")
+        
+        # α = (E_2 - E_1) - (E_1 - E_0) for all points at once
+        anharmonicity = np.subtract(np.subtract(E[:, 2], E[:, 1]),
+                                    np.subtract(E[:, 1], E[:, 0]))
+        
+        # NaN rows from failed sweep points propagate and are left out here
+        # (the reductions are skipped when INFO records would be dropped)
+        valid = anharmonicity[np.isfinite(anharmonicity)]
+        if not valid.size:
+            logger.warning("Anharmonicity undefined at every sweep point")
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info("Anharmonicity over %d/%d points: min %.4f, max %.4f, "
+                        "mean %.4f GHz", valid.size, len(anharmonicity),
+                        valid.min(), valid.max(), valid.mean())
+        
+        return anharmonicity
+        
+    except Exception as e:
+        error_msg = f"Error calculating anharmonicity: {e}"
+        logger.error(error_msg, exc_info=True)
+        raise
+
+
 def calculate_coupling_strength(circuit1, circuit2, coupling_element=None):
     """
     Calculate coupling strength between two RQL gates.
@@ -233,16 +952,19 @@ def calculate_coupling_strength(circuit1, circuit2, coupling_element=None):
         # This is a placeholder - full implementation would require
         # detailed circuit analysis
         
-        # Get ground states of individual circuits
-        E1, _ = diagonalize_hamiltonian(circuit1, n_levels=2)
-        E2, _ = diagonalize_hamiltonian(circuit2, n_levels=2)
+        # Get ground states of individual circuits; only the energies are
+        # used, so skip the eigenvectors
+        E1, _ = diagonalize_hamiltonian(circuit1, n_levels=2,
+                                        return_eigvecs=False)
+        E2, _ = diagonalize_hamiltonian(circuit2, n_levels=2,
+                                        return_eigvecs=False)
         
         # Estimate coupling (simplified)
         # In real implementation, would analyze anti-crossing in energy spectrum
         coupling = 0.1 * min(abs(E1[0] - E2[0]), 1.0)  # Simplified estimate
         
         print(f"Checkpoint: Estimated coupling strength: {coupling:.4f} GHz")
-        logger.info(f"Estimated coupling strength: {coupling:.4f} GHz")
+        logger.info("Estimated coupling strength: %.4f GHz", coupling)
         
         return coupling
         
@@ -264,7 +986,7 @@ def compute_transition_frequencies(energies):
         numpy.ndarray: Array of transition frequencies in GHz.
     """
     try:
-        energies = np.array(energies)
+        energies = np.asarray(energies, dtype=np.float64)
         
         if len(energies) < 2:
             raise ValueError("Need at least 2 energy levels")
@@ -273,7 +995,45 @@ def compute_transition_frequencies(energies):
         transitions = energies[1:] - energies[0]
         
         print(f"Checkpoint: Transition frequencies computed")
-        logger.info(f"Transition frequencies: {transitions} GHz")
+        logger.info("Transition frequencies: %s GHz", transitions)
+        
+        return transitions
+        
+    except Exception as e:
+        error_msg = f"Error computing transition frequencies: {e}"
+        logger.error(error_msg, exc_info=True)
+        raise
+
+
+def compute_transition_frequencies_batch(energy_levels):
+    """
+    Compute transition frequencies from the ground state at every sweep point.
+    
+    Vectorized form of compute_transition_frequencies for the
+    (n_points, n_levels) output of flux_sweep.
+    
+    Args:
+        energy_levels (array-like): 2D array (n_points, n_levels) of energies
+                                    in GHz.
+        
+    Returns:
+        numpy.ndarray: 2D array (n_points, n_levels - 1) of transition
+                       frequencies in GHz.
+        
+    Raises:
+        ValueError: If the input is not 2D or has fewer than 2 levels.
+    """
+    try:
+        E = np.asarray(energy_levels, dtype=np.float64)
+        
+        if E.ndim != 2 or E.shape[1] < 2:
+            raise ValueError("Need a 2D array with at least 2 energy levels, "
+                             f"got shape {E.shape}")
+        
+        # Broadcast the ground state column over the excited levels
+        transitions = E[:, 1:] - E[:, :1]
+        
+        logger.info("Transition frequencies computed for %d points", E.shape[0])
         
         return transitions
         
@@ -304,14 +1064,18 @@ def simulate_time_evolution(circuit, initial_state=None, times=None, drive=None)
         RuntimeError: If simulation fails.
     """
     try:
+        from qutip import Qobj, basis, sesolve
+        
         print("Checkpoint: Starting time evolution simulation")
         logger.info("Starting time evolution simulation")
         
         if times is None:
             times = np.linspace(0, 100, 1000)  # 0-100 ns, 1000 points
         
-        # Get Hamiltonian from circuit
-        energies, eigenvecs = diagonalize_hamiltonian(circuit, n_levels=10)
+        # Get Hamiltonian from circuit; it is built in the eigenbasis, so
+        # only the energies are needed
+        energies, _ = diagonalize_hamiltonian(circuit, n_levels=10,
+                                              return_eigvecs=False)
         
         # Construct Hamiltonian matrix
         H = Qobj(np.diag(energies))
@@ -6,17 +6,85 @@ and parameter validation. Includes functions for plotting energy spectra,
 anti-crossings, and handling simulation errors.
 """
 
+import functools
 import logging
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, TYPE_CHECKING
 import os
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+def _min_gap_kernel(e1, e2):
+    """
+    Single-pass minimum-gap search behind _min_gap.
+    
+    Allocates no temporary gap array and skips points where either curve is
+    NaN (failed sweep points). Written in the subset of Python that Numba
+    compiles; ``fastmath`` is left off because it lets the compiler assume
+    no NaNs.
+    """
+    best = -1
+    best_gap = np.inf
+    for i in range(e1.shape[0]):
+        gap = abs(e2[i] - e1[i])
+        if np.isfinite(gap) and gap < best_gap:
+            best_gap = gap
+            best = i
+    if best < 0:
+        return best, np.nan
+    return best, best_gap
+
+
+def _min_gap_numpy(e1, e2):
+    """Vectorized minimum-gap search used when Numba is not installed."""
+    gaps = np.abs(np.subtract(e2, e1))
+    finite = np.isfinite(gaps)
+    if not finite.any():
+        return -1, np.nan
+    # Non-finite gaps can never be the minimum
+    best = int(np.argmin(np.where(finite, gaps, np.inf)))
+    return best, gaps[best]
+
+
+# Compiled lazily: importing Numba alone costs a few hundred milliseconds of
+# start-up time that CLI runs and app reruns without an anti-crossing plot
+# should not pay
+_min_gap_impl = None
+
+
+def _min_gap(e1, e2):
+    """
+    Locate the minimum gap between two energy-level curves.
+    
+    Compiled with Numba on the first call when it is installed;
+    ``cache=True`` stores the machine code on disk so only the first process
+    pays the compilation time. Without Numba a vectorized NumPy search is
+    used instead, since the kernel would run as an interpreted loop.
+    
+    Args:
+        e1 (np.ndarray): First level energies over the sweep.
+        e2 (np.ndarray): Second level energies over the sweep.
+        
+    Returns:
+        tuple: (index, gap) of the minimum absolute gap, or (-1, nan) if no
+            point has finite energies on both curves.
+    """
+    global _min_gap_impl
+    if _min_gap_impl is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _min_gap_impl = _min_gap_numpy
+        else:
+            _min_gap_impl = njit(cache=True)(_min_gap_kernel)
+    return _min_gap_impl(e1, e2)
+
+
 def setup_logging(log_file='simulation_errors.log', level=logging.INFO):
     """
     Set up logging configuration for the simulator.
@@ -31,14 +99,18 @@ def setup_logging(log_file='simulation_errors.log', level=logging.INFO):
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
         
+        # Full log goes to the file; the console (stderr) only gets
+        # warnings and errors
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(level)
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.WARNING)
+        
         # Configure logging
         logging.basicConfig(
             level=level,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()  # Also log to console
-            ]
+            handlers=[file_handler, console_handler]
         )
         
         print(f"Checkpoint: Logging configured to {log_file}")
@@ -50,6 +122,45 @@ def setup_logging(log_file='simulation_errors.log', level=logging.INFO):
         logging.basicConfig(level=level)
 
 
+# Value rules of validate_parameters, in priority order: the first rule
+# with a tag contained in the lowercased parameter name applies
+_VALIDATORS = (
+    (('flux',), lambda v: 0 <= float(v) <= 1,
+     "{key} must be between 0 and 1, got {value}"),
+    (('energy', 'ej', 'ec'), lambda v: float(v) > 0,
+     "{key} must be positive, got {value}"),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _validator_for(key: str):
+    """Return the (check, message) rule for a parameter name, or None."""
+    key_lower = key.lower()
+    for tags, check, message in _VALIDATORS:
+        if any(tag in key_lower for tag in tags):
+            return check, message
+    return None
+
+
+def _check_parameters(params: dict, required_keys: List[str]) -> None:
+    """Raise ValueError if ``params`` fails validate_parameters' checks."""
+    missing_keys = [key for key in required_keys if key not in params]
+    if missing_keys:
+        raise ValueError(f"Missing required parameters: {missing_keys}")
+    
+    for key in required_keys:
+        value = params[key]
+        if value is None:
+            raise ValueError(f"Parameter {key} cannot be None")
+        
+        # Type-specific validation
+        rule = _validator_for(key)
+        if rule is not None:
+            check, message = rule
+            if not check(value):
+                raise ValueError(message.format(key=key, value=value))
+
+
 def validate_parameters(params: dict, required_keys: List[str]) -> bool:
     """
     Validate that all required parameters are present and valid.
@@ -65,36 +176,50 @@ def validate_parameters(params: dict, required_keys: List[str]) -> bool:
         ValueError: If required parameters are missing or invalid.
     """
     try:
-        missing_keys = [key for key in required_keys if key not in params]
-        if missing_keys:
-            raise ValueError(f"Missing required parameters: {missing_keys}")
-        
-        for key in required_keys:
-            value = params[key]
-            if value is None:
-                raise ValueError(f"Parameter {key} cannot be None")
-            
-            # Type-specific validation
-            if 'flux' in key.lower():
-                if not (0 <= float(value) <= 1):
-                    raise ValueError(f"{key} must be between 0 and 1, got {value}")
-            elif 'energy' in key.lower() or 'ej' in key.lower() or 'ec' in key.lower():
-                if float(value) <= 0:
-                    raise ValueError(f"{key} must be positive, got {value}")
-        
+        _check_parameters(params, required_keys)
         return True
         
     except Exception as e:
-        logger.error(f"Parameter validation failed: {e}")
+        logger.error("Parameter validation failed: %s", e)
         raise
 
 
+def validate_parameters_bulk(param_sets: List[dict],
+                             required_keys: List[str]) -> List[int]:
+    """
+    Validate many parameter sets, e.g. the points of a parameter sweep.
+    
+    Unlike validate_parameters this does not raise or log per failure.
+    
+    Args:
+        param_sets (list): Parameter dictionaries to validate.
+        required_keys (list): List of required parameter keys.
+        
+    Returns:
+        list: Indexes of the parameter sets that failed validation.
+    """
+    failures = []
+    for i, params in enumerate(param_sets):
+        try:
+            _check_parameters(params, required_keys)
+        except (TypeError, ValueError):
+            failures.append(i)
+    
+    if failures:
+        logger.warning("%d of %d parameter sets failed validation",
+                       len(failures), len(param_sets))
+    
+    return failures
+
+
 def plot_energy_spectrum(energies: np.ndarray, 
                         flux_values: Optional[np.ndarray] = None,
                         title: str = "Energy Spectrum",
                         xlabel: str = "Energy Level",
                         ylabel: str = "Energy (GHz)",
-                        save_path: Optional[str] = None) -> plt.Figure:
+                        save_path: Optional[str] = None,
+                        ax: Optional["plt.Axes"] = None,
+                        dpi: int = 150) -> "plt.Figure":
     """
     Plot energy spectrum of RQL gate.
     
@@ -106,18 +231,32 @@ def plot_energy_spectrum(energies: np.ndarray,
         xlabel (str): X-axis label. Default is "Energy Level".
         ylabel (str): Y-axis label. Default is "Energy (GHz)".
         save_path (str, optional): Path to save figure. If None, don't save.
+        ax (matplotlib.axes.Axes, optional): Existing (cleared) axes to draw
+            into. If None, a new figure is created.
+        dpi (int): Resolution used when saving to a raster format. Default
+            is 150; .pdf/.svg paths are written as vector graphics.
         
     Returns:
-        matplotlib.figure.Figure: Figure object.
+        matplotlib.figure.Figure: Figure object. A figure created here is
+            closed in pyplot; it can still be saved or passed to st.pyplot.
     """
     try:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        if ax is None:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(10, 6))
+            # Drop the figure from pyplot's registry right away so repeated
+            # calls do not accumulate open figures; the Figure itself stays
+            # usable for drawing, savefig and st.pyplot
+            plt.close(fig)
+        else:
+            fig = ax.figure
         
-        energies = np.array(energies)
+        energies = np.asarray(energies, dtype=np.float64)
         
         if energies.ndim == 1:
             # Single set of energies
-            ax.plot(range(len(energies)), energies, 'o-', linewidth=2, markersize=8)
+            ax.plot(np.arange(energies.shape[0]), energies, 'o-',
+                    linewidth=2, markersize=8)
             ax.set_xlabel(xlabel)
             ax.set_ylabel(ylabel)
             
@@ -126,9 +265,10 @@ def plot_energy_spectrum(energies: np.ndarray,
             if flux_values is None:
                 flux_values = np.arange(energies.shape[0])
             
-            for i in range(min(5, energies.shape[1])):  # Plot first 5 levels
-                ax.plot(flux_values, energies[:, i], linewidth=2, 
-                       label=f'Level {i}')
+            # One contiguous row per level instead of strided column slices
+            levels = np.ascontiguousarray(energies[:, :5].T)  # First 5 levels
+            for i, level in enumerate(levels):
+                ax.plot(flux_values, level, linewidth=2, label=f'Level {i}')
             
             ax.set_xlabel("Flux (Φ₀)")
             ax.set_ylabel("Energy (GHz)")
@@ -136,12 +276,12 @@ def plot_energy_spectrum(energies: np.ndarray,
             ax.grid(True, alpha=0.3)
         
         ax.set_title(title)
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=dpi)
             print(f"Checkpoint: Figure saved to {save_path}")
-            logger.info(f"Figure saved to {save_path}")
+            logger.info("Figure saved to %s", save_path)
         
         return fig
         
@@ -155,7 +295,9 @@ def plot_energy_spectrum(energies: np.ndarray,
 def plot_flux_sweep(flux_values: np.ndarray,
                    energy_levels: np.ndarray,
                    title: str = "Energy vs Flux",
-                   save_path: Optional[str] = None) -> plt.Figure:
+                   save_path: Optional[str] = None,
+                   ax: Optional["plt.Axes"] = None,
+                   dpi: int = 150) -> "plt.Figure":
     """
     Plot flux sweep showing energy levels vs external flux.
     
@@ -164,19 +306,38 @@ def plot_flux_sweep(flux_values: np.ndarray,
         energy_levels (np.ndarray): 2D array (n_points, n_levels) of energies in GHz.
         title (str): Plot title. Default is "Energy vs Flux".
         save_path (str, optional): Path to save figure. If None, don't save.
+        ax (matplotlib.axes.Axes, optional): Existing (cleared) axes to draw
+            into. If None, a new figure is created.
+        dpi (int): Resolution used when saving to a raster format. Default
+            is 150; .pdf/.svg paths are written as vector graphics.
         
     Returns:
-        matplotlib.figure.Figure: Figure object.
+        matplotlib.figure.Figure: Figure object. A figure created here is
+            closed in pyplot; it can still be saved or passed to st.pyplot.
     """
     try:
-        fig, ax = plt.subplots(figsize=(12, 8))
+        import matplotlib
         
-        n_levels = energy_levels.shape[1]
-        colors = plt.cm.viridis(np.linspace(0, 1, n_levels))
-        
-        for i in range(n_levels):
-            ax.plot(flux_values, energy_levels[:, i], 
-                   linewidth=2, color=colors[i], label=f'Level {i}')
+        if ax is None:
+            import matplotlib.pyplot as plt
+            fig, ax = plt.subplots(figsize=(12, 8))
+            plt.close(fig)
+        else:
+            fig = ax.figure
+        
+        energy_levels = np.asarray(energy_levels, dtype=np.float64)
+        
+        # One contiguous row per level instead of strided column slices.
+        # Colors come from the default property cycle unless it is too short
+        # to give every level its own color
+        levels = np.ascontiguousarray(energy_levels.T)
+        if len(levels) > len(matplotlib.rcParams['axes.prop_cycle']):
+            colors = matplotlib.colormaps['viridis'](
+                np.linspace(0, 1, len(levels))
+            )
+            ax.set_prop_cycle(color=colors)
+        for i, level in enumerate(levels):
+            ax.plot(flux_values, level, linewidth=2, label=f'Level {i}')
         
         ax.set_xlabel("Flux (Φ₀)", fontsize=12)
         ax.set_ylabel("Energy (GHz)", fontsize=12)
@@ -184,12 +345,12 @@ def plot_flux_sweep(flux_values: np.ndarray,
         ax.legend()
         ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=dpi)
             print(f"Checkpoint: Flux sweep plot saved to {save_path}")
-            logger.info(f"Flux sweep plot saved to {save_path}")
+            logger.info("Flux sweep plot saved to %s", save_path)
         
         return fig
         
@@ -205,7 +366,8 @@ def plot_anti_crossing(flux_values: np.ndarray,
                       level1: int = 0,
                       level2: int = 1,
                       title: str = "Anti-Crossing",
-                      save_path: Optional[str] = None) -> plt.Figure:
+                      save_path: Optional[str] = None,
+                      dpi: int = 150) -> "plt.Figure":
     """
     Plot anti-crossing between two energy levels, indicating coupling.
     
@@ -216,13 +378,20 @@ def plot_anti_crossing(flux_values: np.ndarray,
         level2 (int): Second energy level index. Default is 1.
         title (str): Plot title. Default is "Anti-Crossing".
         save_path (str, optional): Path to save figure. If None, don't save.
+        dpi (int): Resolution used when saving to a raster format. Default
+            is 150; .pdf/.svg paths are written as vector graphics.
         
     Returns:
-        matplotlib.figure.Figure: Figure object.
+        matplotlib.figure.Figure: Figure object, closed in pyplot; it can
+            still be saved or passed to st.pyplot.
     """
     try:
+        import matplotlib.pyplot as plt
+        
         fig, ax = plt.subplots(figsize=(10, 6))
+        plt.close(fig)
         
+        energy_levels = np.asarray(energy_levels, dtype=np.float64)
         if level2 >= energy_levels.shape[1]:
             raise ValueError(f"Level {level2} not available (max: {energy_levels.shape[1]-1})")
         
@@ -232,17 +401,20 @@ def plot_anti_crossing(flux_values: np.ndarray,
                linewidth=2, label=f'Level {level2}')
         
         # Highlight minimum gap
-        gap = np.abs(energy_levels[:, level2] - energy_levels[:, level1])
-        min_gap_idx = np.argmin(gap)
-        min_gap = gap[min_gap_idx]
-        min_gap_flux = flux_values[min_gap_idx]
-        
-        ax.axvline(min_gap_flux, color='g', linestyle='--', 
-                  label=f'Min gap: {min_gap:.4f} GHz')
-        ax.scatter([min_gap_flux], [energy_levels[min_gap_idx, level1]], 
-                  color='g', s=100, zorder=5)
-        ax.scatter([min_gap_flux], [energy_levels[min_gap_idx, level2]], 
-                  color='g', s=100, zorder=5)
+        min_gap_idx, min_gap = _min_gap(
+            energy_levels[:, level1], energy_levels[:, level2]
+        )
+        if min_gap_idx >= 0:
+            min_gap_flux = flux_values[min_gap_idx]
+            
+            ax.axvline(min_gap_flux, color='g', linestyle='--', 
+                      label=f'Min gap: {min_gap:.4f} GHz')
+            ax.scatter([min_gap_flux], [energy_levels[min_gap_idx, level1]], 
+                      color='g', s=100, zorder=5)
+            ax.scatter([min_gap_flux], [energy_levels[min_gap_idx, level2]], 
+                      color='g', s=100, zorder=5)
+        else:
+            logger.warning("No finite gap between levels %d and %d", level1, level2)
         
         ax.set_xlabel("Flux (Φ₀)", fontsize=12)
         ax.set_ylabel("Energy (GHz)", fontsize=12)
@@ -250,12 +422,12 @@ def plot_anti_crossing(flux_values: np.ndarray,
         ax.legend()
         ax.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
+            fig.savefig(save_path, dpi=dpi)
             print(f"Checkpoint: Anti-crossing plot saved to {save_path}")
-            logger.info(f"Anti-crossing plot saved to {save_path}")
+            logger.info("Anti-crossing plot saved to %s", save_path)
         
         return fig
         
@@ -278,26 +450,24 @@ def calculate_gate_metrics(energies: np.ndarray) -> dict:
               transition frequency, anharmonicity, etc.
     """
     try:
-        energies = np.array(energies)
+        energies = np.asarray(energies, dtype=np.float64)
         
         if len(energies) < 2:
             raise ValueError("Need at least 2 energy levels")
         
+        # Level spacings E1 - E0 (and E2 - E1) in one NumPy call
+        gaps = np.diff(energies[:3])
+        
         metrics = {
             'ground_state_energy': float(energies[0]),
-            'first_excited_energy': float(energies[1]) if len(energies) > 1 else None,
-            'transition_frequency': float(energies[1] - energies[0]) if len(energies) > 1 else None,
+            'first_excited_energy': float(energies[1]),
+            'transition_frequency': float(gaps[0]),
+            'anharmonicity': float(gaps[1] - gaps[0]) if len(gaps) > 1 else None,
         }
         
-        if len(energies) >= 3:
-            metrics['anharmonicity'] = float((energies[2] - energies[1]) - 
-                                            (energies[1] - energies[0]))
-        else:
-            metrics['anharmonicity'] = None
-        
         return metrics
         
     except Exception as e:
-        logger.error(f"Error calculating gate metrics: {e}")
+        logger.error("Error calculating gate metrics: %s", e)
         raise
 
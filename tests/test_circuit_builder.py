@@ -45,6 +45,18 @@ class TestCircuitBuilder(unittest.TestCase):
         with self.assertRaises(ValueError):
             circuit_builder.validate_energy(0.0)
     
+    def test_set_validation(self):
+        """Test that validation can be switched off and on again."""
+        circuit_builder.set_validation(False)
+        try:
+            self.assertTrue(circuit_builder.validate_flux(1.5))
+            self.assertTrue(circuit_builder.validate_energy(-1.0))
+        finally:
+            circuit_builder.set_validation(True)
+        
+        with self.assertRaises(ValueError):
+            circuit_builder.validate_flux(1.5)
+    
     def test_build_rql_inverter(self):
         """Test building RQL inverter."""
         try:
@@ -62,6 +74,14 @@ class TestCircuitBuilder(unittest.TestCase):
         
         with self.assertRaises(ValueError):
             circuit_builder.build_rql_inverter(Ej=10.0, Ec=0.2, flux=1.5)
+    
+    def test_build_rql_loop_records_elements(self):
+        """Test that the builder records the circuit's loops and junctions."""
+        circuit = circuit_builder.build_rql_loop(Ej=10.0, Ec=0.2, flux=0.5)
+        self.assertEqual(len(circuit._rql_loops), 1)
+        self.assertIs(circuit._rql_loops[0], circuit.loops[0])
+        self.assertEqual(len(circuit._rql_jjs), 1)
+        self.assertIn(circuit._rql_jjs[0], circuit.elements[(0, 1)])
 
 
 if __name__ == '__main__':
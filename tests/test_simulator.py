@@ -0,0 +1,366 @@
+"""
+Unit tests for simulator module.
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src import circuit_builder
+from src import simulator
+
+
+class TestFluxSweep(unittest.TestCase):
+    """Test cases for simulator.flux_sweep."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        simulator.clear_diag_cache()
+        self.circuit = circuit_builder.build_rql_loop(
+            Ej=10.0, Ec=0.2, flux=0.5, trunc=12
+        )
+
+    def test_flux_sweep_matches_rebuild(self):
+        """Test in-place flux sweep against rebuilding the circuit per point."""
+        flux_values, energy_levels = simulator.flux_sweep(
+            self.circuit, flux_range=(0.0, 1.0), n_points=5, n_levels=3
+        )
+
+        self.assertEqual(energy_levels.shape, (5, 3))
+        for flux_val, energies in zip(flux_values, energy_levels):
+            circuit = circuit_builder.build_rql_loop(
+                Ej=10.0, Ec=0.2, flux=flux_val, trunc=12
+            )
+            expected, _ = simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+            np.testing.assert_allclose(energies, expected, atol=1e-8)
+
+    def test_flux_sweep_restores_flux(self):
+        """Test that the swept loop keeps its original flux afterwards."""
+        before, _ = simulator.diagonalize_hamiltonian(self.circuit, n_levels=3)
+        simulator.flux_sweep(self.circuit, n_points=5, n_levels=3)
+        after, _ = simulator.diagonalize_hamiltonian(
+            self.circuit, n_levels=3, cache=False
+        )
+
+        np.testing.assert_allclose(after, before, atol=1e-8)
+
+    def _dense_reference(self, flux_values, trunc, n_levels):
+        """Compute sweep energies with a full dense eigensolve per point."""
+        expected = []
+        for flux_val in flux_values:
+            circuit = circuit_builder.build_rql_loop(
+                Ej=10.0, Ec=0.2, flux=flux_val, trunc=trunc
+            )
+            eigenvals = np.linalg.eigvalsh(circuit.hamiltonian().full())
+            expected.append(simulator._to_ghz(eigenvals[:n_levels]))
+        return np.array(expected)
+
+    def test_sparse_flux_sweep_matches_rebuild(self):
+        """Test the warm-started sparse sweep against dense rebuilds."""
+        circuit = circuit_builder.build_rql_loop(
+            Ej=10.0, Ec=0.2, flux=0.5, trunc=80
+        )
+        with mock.patch.object(simulator, 'eigsh',
+                               wraps=simulator.eigsh) as eigsh:
+            flux_values, energy_levels = simulator.flux_sweep(
+                circuit, n_points=5, n_levels=3
+            )
+
+        warm = [c for c in eigsh.call_args_list if 'sigma' in c.kwargs]
+        self.assertEqual(len(warm), 4)
+        np.testing.assert_allclose(
+            energy_levels, self._dense_reference(flux_values, 80, 3), atol=1e-8
+        )
+
+    def test_sparse_flux_sweep_solver_controls(self):
+        """Test that tol and maxiter reach every sparse eigensolve."""
+        circuit = circuit_builder.build_rql_loop(
+            Ej=10.0, Ec=0.2, flux=0.5, trunc=80
+        )
+        with mock.patch.object(simulator, 'eigsh',
+                               wraps=simulator.eigsh) as eigsh:
+            flux_values, energy_levels = simulator.flux_sweep(
+                circuit, n_points=4, n_levels=3, tol=1e-10, maxiter=500
+            )
+
+        self.assertEqual(eigsh.call_count, 4)
+        for call in eigsh.call_args_list:
+            self.assertEqual(call.kwargs['tol'], 1e-10)
+            self.assertEqual(call.kwargs['maxiter'], 500)
+        np.testing.assert_allclose(
+            energy_levels, self._dense_reference(flux_values, 80, 3), atol=1e-6
+        )
+
+    def test_sparse_flux_sweep_retries_cold(self):
+        """Test that failed or unreliable warm starts fall back to cold solves."""
+        eigsh = simulator.eigsh
+
+        def no_convergence(H, **kwargs):
+            if 'sigma' in kwargs:
+                raise simulator.ArpackNoConvergence("no convergence", [], [])
+            return eigsh(H, **kwargs)
+
+        def below_shift(H, **kwargs):
+            eigenvals, eigenvecs = eigsh(H, **kwargs)
+            if 'sigma' in kwargs:
+                # Far enough below the shift that levels could be missing
+                eigenvals = eigenvals - 10 * np.abs(eigenvals).max()
+            return eigenvals, eigenvecs
+
+        for side_effect in (no_convergence, below_shift):
+            with self.subTest(side_effect.__name__):
+                simulator.clear_diag_cache()
+                circuit = circuit_builder.build_rql_loop(
+                    Ej=10.0, Ec=0.2, flux=0.5, trunc=80
+                )
+                with mock.patch.object(simulator, 'eigsh',
+                                       side_effect=side_effect) as patched:
+                    flux_values, energy_levels = simulator.flux_sweep(
+                        circuit, n_points=4, n_levels=3
+                    )
+
+                cold = [c for c in patched.call_args_list
+                        if 'sigma' not in c.kwargs]
+                self.assertEqual(len(cold), 4)
+                np.testing.assert_allclose(
+                    energy_levels, self._dense_reference(flux_values, 80, 3),
+                    atol=1e-8
+                )
+
+    def test_flux_sweep_failed_point_is_nan(self):
+        """Test that a point that fails to diagonalize is left as NaN."""
+        eigensolve = simulator._eigensolve
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(None)
+            if len(calls) == 3:
+                raise RuntimeError("solver failure")
+            return eigensolve(*args, **kwargs)
+
+        with mock.patch.object(simulator, '_eigensolve', side_effect=flaky):
+            _, energy_levels = simulator.flux_sweep(
+                self.circuit, n_points=5, n_levels=3
+            )
+
+        self.assertTrue(np.isnan(energy_levels[2]).all())
+        self.assertTrue(np.isfinite(np.delete(energy_levels, 2, axis=0)).all())
+        anharmonicity = simulator.calculate_anharmonicity_batch(energy_levels)
+        self.assertTrue(np.isnan(anharmonicity[2]))
+
+    def test_parallel_sweep_matches_serial(self):
+        """Test that workers sweep the circuit's current state, not the build."""
+        circuit = circuit_builder.build_rql_loop(Ej=20.0, El=0.05, trunc=4)
+        circuit.set_trunc_nums([30])
+        _, serial = simulator.flux_sweep(circuit, n_points=8, n_levels=3)
+        with mock.patch.object(simulator.os, 'cpu_count', return_value=2):
+            _, parallel = simulator.flux_sweep(circuit, n_points=8, n_levels=3,
+                                               n_jobs=2)
+
+        np.testing.assert_allclose(parallel, serial, atol=1e-8)
+
+    def test_flux_sweep_invalid_range(self):
+        """Test flux sweep with an invalid flux range."""
+        with self.assertRaises(RuntimeError):
+            simulator.flux_sweep(self.circuit, flux_range=(0.5, 0.2))
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """Test cases for the vectorized sweep analysis helpers."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.energy_levels = np.array([
+            [0.0, 5.0, 9.8, 14.5],
+            [0.1, 4.9, 9.9, 14.0],
+            [-0.2, 5.2, 10.1, 15.3],
+        ])
+
+    def test_anharmonicity_batch_matches_scalar(self):
+        """Test batched anharmonicity against the per-point function."""
+        batch = simulator.calculate_anharmonicity_batch(self.energy_levels)
+        expected = [simulator.calculate_anharmonicity(row)
+                    for row in self.energy_levels]
+        np.testing.assert_allclose(batch, expected)
+
+    def test_transition_frequencies_batch_matches_scalar(self):
+        """Test batched transition frequencies against the per-point function."""
+        batch = simulator.compute_transition_frequencies_batch(self.energy_levels)
+        expected = [simulator.compute_transition_frequencies(row)
+                    for row in self.energy_levels]
+        np.testing.assert_allclose(batch, expected)
+
+    def test_batch_requires_enough_levels(self):
+        """Test batched helpers with too few levels."""
+        with self.assertRaises(ValueError):
+            simulator.calculate_anharmonicity_batch(self.energy_levels[:, :2])
+        with self.assertRaises(ValueError):
+            simulator.compute_transition_frequencies_batch(self.energy_levels[0])
+
+
+class TestDiagCache(unittest.TestCase):
+    """Test cases for the in-memory diagonalization cache."""
+
+    def setUp(self):
+        """Start from an empty cache."""
+        simulator.clear_diag_cache()
+
+    def test_repeated_diagonalization_hits(self):
+        """Test that an identical circuit state is served from the cache."""
+        first = simulator.diagonalize_hamiltonian(
+            circuit_builder.build_rql_loop(trunc=12), n_levels=3
+        )
+        second = simulator.diagonalize_hamiltonian(
+            circuit_builder.build_rql_loop(trunc=12), n_levels=3
+        )
+
+        self.assertEqual(len(simulator._DIAG_CACHE), 1)
+        np.testing.assert_allclose(second[0], first[0])
+        self.assertIs(second[1][0], first[1][0])
+
+    def test_cache_hit_sets_circuit_eigenstate(self):
+        """Test that a cache hit leaves the circuit usable like a diag()."""
+        simulator.diagonalize_hamiltonian(
+            circuit_builder.build_rql_loop(trunc=12), n_levels=3
+        )
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        energies, eigenvecs = simulator.diagonalize_hamiltonian(
+            circuit, n_levels=3
+        )
+
+        self.assertEqual(len(simulator._DIAG_CACHE), 1)
+        self.assertIs(circuit._evecs[0], eigenvecs[0])
+        np.testing.assert_allclose(simulator._to_ghz(circuit._efreqs), energies)
+        circuit.check_convergence()
+
+    def test_cache_key_tracks_state(self):
+        """Test that flux, truncation and n_levels changes miss the cache."""
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        simulator.diagonalize_hamiltonian(circuit, n_levels=4)
+        circuit.loops[0].set_flux(0.25)
+        simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        simulator.diagonalize_hamiltonian(
+            circuit_builder.build_rql_loop(trunc=14), n_levels=3
+        )
+
+        self.assertEqual(len(simulator._DIAG_CACHE), 4)
+
+    def test_cache_key_tracks_loop_membership(self):
+        """Test that circuits differing only in loop membership do not collide."""
+        sq = circuit_builder._import_sqcircuit()
+
+        def build(shared_junction):
+            loop1, loop2 = sq.Loop(value=0.1), sq.Loop(value=0.3)
+            jj1 = sq.Junction(value=10.0, loops=[loop1], unit='GHz')
+            jj2 = sq.Junction(value=5.0, unit='GHz',
+                              loops=[loop1, loop2] if shared_junction else [loop2])
+            inductor = sq.Inductor(value=10.0, unit='GHz',
+                                   loops=[loop2] if shared_junction else [loop1, loop2])
+            circuit = sq.Circuit({(0, 1): [jj1, jj2, inductor,
+                                           sq.Capacitor(value=2.5, unit='GHz')]})
+            circuit.set_trunc_nums([12])
+            return circuit
+
+        first, _ = simulator.diagonalize_hamiltonian(build(False), n_levels=3)
+        second, _ = simulator.diagonalize_hamiltonian(build(True), n_levels=3)
+        expected, _ = simulator.diagonalize_hamiltonian(build(True), n_levels=3,
+                                                        cache=False)
+
+        self.assertEqual(len(simulator._DIAG_CACHE), 2)
+        np.testing.assert_allclose(second, expected, atol=1e-8)
+        self.assertFalse(np.allclose(first, second))
+
+    def test_eigenvalue_only_entry_does_not_serve_eigenvectors(self):
+        """Test that an eigenvalue-only result is not returned for vectors."""
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        energies, eigenvecs = simulator.diagonalize_hamiltonian(
+            circuit, n_levels=3, return_eigvecs=False
+        )
+        self.assertIsNone(eigenvecs)
+
+        full, eigenvecs = simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        self.assertEqual(len(eigenvecs), 3)
+        np.testing.assert_allclose(full, energies, atol=1e-8)
+
+    def test_cached_result_is_not_aliased(self):
+        """Test that modifying a returned result leaves the cache intact."""
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        energies, _ = simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        expected = energies.copy()
+        energies[:] = 0.0
+
+        again, _ = simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        np.testing.assert_allclose(again, expected)
+
+
+class TestDiskCache(unittest.TestCase):
+    """Test cases for the on-disk result cache."""
+
+    def setUp(self):
+        """Enable the cache in a temporary directory."""
+        simulator.clear_diag_cache()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        simulator.set_disk_cache(self.tmpdir.name)
+
+    def tearDown(self):
+        """Disable the cache again."""
+        simulator.set_disk_cache(None)
+        self.tmpdir.cleanup()
+
+    def test_diagonalize_uses_cache(self):
+        """Test that a repeated diagonalization is served from the cache."""
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        first, _ = simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+        simulator.clear_diag_cache()
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        second, eigenvecs = simulator.diagonalize_hamiltonian(
+            circuit, n_levels=3
+        )
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+        np.testing.assert_allclose(second, first)
+        self.assertEqual(len(circuit._evecs), len(eigenvecs))
+
+    def test_sweep_with_failed_point_is_not_stored(self):
+        """Test that a sweep with a NaN point is recomputed on the next call."""
+        eigensolve = simulator._eigensolve
+        calls = []
+
+        def flaky(*args, **kwargs):
+            calls.append(None)
+            if len(calls) == 2:
+                raise RuntimeError("solver failure")
+            return eigensolve(*args, **kwargs)
+
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        with mock.patch.object(simulator, '_eigensolve', side_effect=flaky):
+            _, first = simulator.flux_sweep(circuit, n_points=5, n_levels=3)
+        self.assertTrue(np.isnan(first).any())
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+        _, second = simulator.flux_sweep(circuit, n_points=5, n_levels=3)
+        self.assertTrue(np.isfinite(second).all())
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 1)
+
+    def test_cache_key_tracks_flux(self):
+        """Test that changing a loop flux after the build misses the cache."""
+        circuit = circuit_builder.build_rql_loop(trunc=12)
+        simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+        circuit.loops[0].set_flux(0.25)
+        simulator.diagonalize_hamiltonian(circuit, n_levels=3)
+
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Unit tests for utils module.
+"""
+
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src import utils
+
+
+class TestValidateParameters(unittest.TestCase):
+    """Test cases for parameter validation."""
+
+    def test_validate_parameters(self):
+        """Test validation of flux and energy parameters."""
+        params = {'Ej': 10.0, 'Ec': 0.2, 'flux': 0.5, 'trunc': 20}
+        self.assertTrue(
+            utils.validate_parameters(params, ['Ej', 'Ec', 'flux', 'trunc'])
+        )
+
+        with self.assertRaises(ValueError):
+            utils.validate_parameters({'flux1': 1.5}, ['flux1'])
+        with self.assertRaises(ValueError):
+            utils.validate_parameters({'Ej2': 0.0}, ['Ej2'])
+        with self.assertRaises(ValueError):
+            utils.validate_parameters({'Ej': 10.0}, ['Ej', 'Ec'])
+
+    def test_validate_parameters_bulk(self):
+        """Test that bulk validation reports the failing parameter sets."""
+        param_sets = [
+            {'Ej': 10.0, 'flux': 0.5},
+            {'Ej': -1.0, 'flux': 0.5},
+            {'Ej': 10.0, 'flux': 2.0},
+            {'Ej': 10.0},
+        ]
+        failures = utils.validate_parameters_bulk(param_sets, ['Ej', 'flux'])
+        self.assertEqual(failures, [1, 2, 3])
+
+
+class TestMinGap(unittest.TestCase):
+    """Test cases for the anti-crossing gap search."""
+
+    def test_min_gap_skips_nan(self):
+        """Test that NaN sweep points are ignored when locating the gap."""
+        e1 = np.array([0.0, 0.0, np.nan, 0.0])
+        e2 = np.array([3.0, 2.0, np.nan, 1.0])
+        idx, gap = utils._min_gap(e1, e2)
+        self.assertEqual(idx, 3)
+        self.assertAlmostEqual(gap, 1.0)
+
+        idx, gap = utils._min_gap(np.full(3, np.nan), np.zeros(3))
+        self.assertEqual(idx, -1)
+        self.assertTrue(np.isnan(gap))
+
+    def test_min_gap_numpy_fallback(self):
+        """Test that the NumPy fallback agrees with the compiled kernel."""
+        rng = np.random.default_rng(0)
+        e1, e2 = rng.random(50), rng.random(50)
+        e1[[3, 17]] = np.nan
+        self.assertEqual(utils._min_gap_numpy(e1, e2),
+                         utils._min_gap_kernel(e1, e2))
+
+        idx, gap = utils._min_gap_numpy(np.full(3, np.nan), np.zeros(3))
+        self.assertEqual(idx, -1)
+        self.assertTrue(np.isnan(gap))
+
+
+if __name__ == '__main__':
+    unittest.main()